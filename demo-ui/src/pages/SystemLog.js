@@ -15,7 +15,7 @@ function SystemLog() {
         }
       });
       
-      setLogs(response.data);
+      setLogs(response.data.items);
       setLoading(false);
     } catch (error) {
       console.error('Error fetching notifications:', error);
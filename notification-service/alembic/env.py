@@ -9,7 +9,7 @@ from sqlalchemy.engine import Connection
 from alembic import context
 
 # Import our models for autogenerate support
-from models import Base, Notification, NotificationSubscription, SeverityLevel, EventType
+from models import Base, Notification, NotificationSubscription, SeverityLevel, EventType, EventPayload, ObjectPath, UserUnread
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
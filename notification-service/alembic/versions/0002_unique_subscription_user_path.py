@@ -0,0 +1,55 @@
+"""Add unique constraint on subscription user and path
+
+Revision ID: 0002_unique_subscription_user_path
+Revises: 0001_add_configuration_tables
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002_unique_subscription_user_path'
+down_revision = '0001_add_configuration_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Remove duplicates left behind by concurrent creates, keeping the oldest
+    op.execute("""
+        UPDATE notifications.notifications n
+        SET subscription_id = keep.id
+        FROM notifications.notification_subscriptions dup
+        JOIN LATERAL (
+            SELECT s.id
+            FROM notifications.notification_subscriptions s
+            WHERE s.user_id = dup.user_id AND s.path = dup.path
+            ORDER BY s.created_at, s.id
+            LIMIT 1
+        ) keep ON keep.id <> dup.id
+        WHERE n.subscription_id = dup.id
+    """)
+    op.execute("""
+        DELETE FROM notifications.notification_subscriptions dup
+        USING notifications.notification_subscriptions keep
+        WHERE dup.user_id = keep.user_id
+          AND dup.path = keep.path
+          AND (dup.created_at, dup.id) > (keep.created_at, keep.id)
+    """)
+    
+    op.create_unique_constraint(
+        'uq_notification_subscriptions_user_path',
+        'notification_subscriptions',
+        ['user_id', 'path'],
+        schema='notifications'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        'uq_notification_subscriptions_user_path',
+        'notification_subscriptions',
+        schema='notifications',
+        type_='unique'
+    )
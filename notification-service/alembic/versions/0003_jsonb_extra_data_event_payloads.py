@@ -0,0 +1,53 @@
+"""Store extra_data as JSONB and deduplicate event payloads
+
+Revision ID: 0003_jsonb_extra_data_event_payloads
+Revises: 0002_unique_subscription_user_path
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0003_jsonb_extra_data_event_payloads'
+down_revision = '0002_unique_subscription_user_path'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One payload row per event, shared by all notifications fanned out from it
+    op.create_table('event_payloads',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='notifications'
+    )
+    op.execute("ALTER TABLE notifications.event_payloads ALTER COLUMN payload SET COMPRESSION lz4")
+    
+    op.alter_column(
+        'notifications',
+        'extra_data',
+        type_=postgresql.JSONB(),
+        postgresql_using='extra_data::jsonb',
+        schema='notifications'
+    )
+    
+    # object_path already has its own column
+    op.execute(
+        "UPDATE notifications.notifications SET extra_data = extra_data - 'object_path' "
+        "WHERE extra_data ? 'object_path'"
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'notifications',
+        'extra_data',
+        type_=sa.JSON(),
+        postgresql_using='extra_data::json',
+        schema='notifications'
+    )
+    op.drop_table('event_payloads', schema='notifications')
@@ -0,0 +1,31 @@
+"""Add trigram index for notification search
+
+Revision ID: 0004_notifications_search_trgm
+Revises: 0003_jsonb_extra_data_event_payloads
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004_notifications_search_trgm'
+down_revision = '0003_jsonb_extra_data_event_payloads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # Must match the search expression built in SystemService so that
+    # '%term%' ILIKE searches can use the index instead of a sequential scan
+    op.execute("""
+        CREATE INDEX notifications_search_trgm
+        ON notifications.notifications
+        USING gin ((title || ' ' || content || ' ' || object_path) gin_trgm_ops)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS notifications.notifications_search_trgm")
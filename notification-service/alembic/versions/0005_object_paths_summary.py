@@ -0,0 +1,101 @@
+"""Maintain distinct object paths in a summary table
+
+Revision ID: 0005_object_paths_summary
+Revises: 0004_notifications_search_trgm
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005_object_paths_summary'
+down_revision = '0004_notifications_search_trgm'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('object_paths',
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('subscription_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('has_notifications', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('path'),
+        schema='notifications'
+    )
+    
+    # Notifications are never deleted, so a path only needs recording once;
+    # the existence check keeps the common case free of row locks
+    op.execute("""
+        CREATE FUNCTION notifications.object_paths_on_notification() RETURNS trigger AS $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM notifications.object_paths
+                WHERE path = NEW.object_path AND has_notifications
+            ) THEN
+                INSERT INTO notifications.object_paths (path, has_notifications, updated_at)
+                VALUES (NEW.object_path, true, now())
+                ON CONFLICT (path) DO UPDATE
+                SET has_notifications = true, updated_at = now();
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER object_paths_notification_insert
+        AFTER INSERT ON notifications.notifications
+        FOR EACH ROW EXECUTE FUNCTION notifications.object_paths_on_notification()
+    """)
+    
+    # Subscriptions are counted so a path can be dropped once nothing refers to it
+    op.execute("""
+        CREATE FUNCTION notifications.object_paths_on_subscription() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO notifications.object_paths (path, subscription_count, updated_at)
+                VALUES (NEW.path, 1, now())
+                ON CONFLICT (path) DO UPDATE
+                SET subscription_count = object_paths.subscription_count + 1;
+            ELSE
+                UPDATE notifications.object_paths
+                SET subscription_count = subscription_count - 1
+                WHERE path = OLD.path;
+                
+                DELETE FROM notifications.object_paths
+                WHERE path = OLD.path AND subscription_count <= 0 AND NOT has_notifications;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER object_paths_subscription_change
+        AFTER INSERT OR DELETE ON notifications.notification_subscriptions
+        FOR EACH ROW EXECUTE FUNCTION notifications.object_paths_on_subscription()
+    """)
+    
+    # Backfill from existing data
+    op.execute("""
+        INSERT INTO notifications.object_paths (path, subscription_count, has_notifications, updated_at)
+        SELECT path, sum(subscription_count), bool_or(has_notifications), now()
+        FROM (
+            SELECT object_path AS path, 0 AS subscription_count, true AS has_notifications
+            FROM notifications.notifications
+            GROUP BY object_path
+            UNION ALL
+            SELECT path, count(*), false
+            FROM notifications.notification_subscriptions
+            GROUP BY path
+        ) paths
+        GROUP BY path
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS object_paths_subscription_change ON notifications.notification_subscriptions")
+    op.execute("DROP TRIGGER IF EXISTS object_paths_notification_insert ON notifications.notifications")
+    op.execute("DROP FUNCTION IF EXISTS notifications.object_paths_on_subscription()")
+    op.execute("DROP FUNCTION IF EXISTS notifications.object_paths_on_notification()")
+    op.drop_table('object_paths', schema='notifications')
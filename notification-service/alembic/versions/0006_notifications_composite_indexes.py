@@ -0,0 +1,41 @@
+"""Replace single-column notification indexes with filter + timestamp composites
+
+Revision ID: 0006_notifications_composite_indexes
+Revises: 0005_object_paths_summary
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006_notifications_composite_indexes'
+down_revision = '0005_object_paths_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_notif_user_ts', 'notifications', ['user_id', 'timestamp'], schema='notifications')
+    op.create_index('ix_notif_path_ts', 'notifications', ['object_path', 'timestamp'], schema='notifications')
+    op.create_index('ix_notif_sev_ts', 'notifications', ['severity', 'timestamp'], schema='notifications')
+    op.create_index(
+        'ix_notif_unread_user_ts', 'notifications', ['user_id', 'timestamp'],
+        schema='notifications', postgresql_where=sa.text('is_read = false')
+    )
+    
+    # Covered by the leading column of the composites above
+    op.drop_index('ix_notifications_user_id', table_name='notifications', schema='notifications')
+    op.drop_index('ix_notifications_object_path', table_name='notifications', schema='notifications')
+    op.drop_index('ix_notifications_severity', table_name='notifications', schema='notifications')
+
+
+def downgrade() -> None:
+    op.create_index('ix_notifications_severity', 'notifications', ['severity'], schema='notifications')
+    op.create_index('ix_notifications_object_path', 'notifications', ['object_path'], schema='notifications')
+    op.create_index('ix_notifications_user_id', 'notifications', ['user_id'], schema='notifications')
+    
+    op.drop_index('ix_notif_unread_user_ts', table_name='notifications', schema='notifications')
+    op.drop_index('ix_notif_sev_ts', table_name='notifications', schema='notifications')
+    op.drop_index('ix_notif_path_ts', table_name='notifications', schema='notifications')
+    op.drop_index('ix_notif_user_ts', table_name='notifications', schema='notifications')
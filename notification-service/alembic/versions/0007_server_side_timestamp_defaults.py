@@ -0,0 +1,35 @@
+"""Default timestamp columns to now() in the database
+
+Revision ID: 0007_server_side_timestamp_defaults
+Revises: 0006_notifications_composite_indexes
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007_server_side_timestamp_defaults'
+down_revision = '0006_notifications_composite_indexes'
+branch_labels = None
+depends_on = None
+
+# Columns that were previously filled in by the application on insert.
+# object_paths.updated_at already has a server default (migration 0005).
+TIMESTAMP_COLUMNS = [
+    ('notification_subscriptions', 'created_at'),
+    ('notifications', 'timestamp'),
+    ('event_payloads', 'created_at'),
+    ('severity_levels', 'created_at'),
+    ('event_types', 'created_at'),
+]
+
+
+def upgrade() -> None:
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=sa.text('now()'), schema='notifications')
+
+
+def downgrade() -> None:
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=None, schema='notifications')
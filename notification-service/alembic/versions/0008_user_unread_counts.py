@@ -0,0 +1,95 @@
+"""Maintain per-user unread notification counts
+
+Revision ID: 0008_user_unread_counts
+Revises: 0007_server_side_timestamp_defaults
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008_user_unread_counts'
+down_revision = '0007_server_side_timestamp_defaults'
+branch_labels = None
+depends_on = None
+
+# Statement-level triggers: multi-row inserts and bulk mark-as-read apply one
+# aggregated delta per user instead of one counter update per row
+TRIGGERS = {
+    'insert': (
+        'AFTER INSERT',
+        'REFERENCING NEW TABLE AS new_rows',
+        """
+        SELECT user_id, count(*)
+        FROM new_rows
+        WHERE NOT is_read
+        GROUP BY user_id
+        """,
+    ),
+    'update': (
+        'AFTER UPDATE',
+        'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows',
+        """
+        SELECT new_rows.user_id, sum(CASE WHEN new_rows.is_read THEN -1 ELSE 1 END)
+        FROM new_rows
+        JOIN old_rows ON old_rows.id = new_rows.id
+        WHERE new_rows.is_read IS DISTINCT FROM old_rows.is_read
+        GROUP BY new_rows.user_id
+        """,
+    ),
+    'delete': (
+        'AFTER DELETE',
+        'REFERENCING OLD TABLE AS old_rows',
+        """
+        SELECT user_id, -count(*)
+        FROM old_rows
+        WHERE NOT is_read
+        GROUP BY user_id
+        """,
+    ),
+}
+
+
+def upgrade() -> None:
+    op.create_table('user_unread',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('unread_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('user_id'),
+        schema='notifications'
+    )
+    
+    for name, (timing, referencing, deltas) in TRIGGERS.items():
+        op.execute(f"""
+            CREATE FUNCTION notifications.user_unread_on_{name}() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO notifications.user_unread (user_id, unread_count)
+                {deltas}
+                ON CONFLICT (user_id) DO UPDATE
+                SET unread_count = user_unread.unread_count + EXCLUDED.unread_count;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE TRIGGER user_unread_{name}
+            {timing} ON notifications.notifications
+            {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION notifications.user_unread_on_{name}()
+        """)
+    
+    # Backfill from existing notifications
+    op.execute("""
+        INSERT INTO notifications.user_unread (user_id, unread_count)
+        SELECT user_id, count(*)
+        FROM notifications.notifications
+        WHERE NOT is_read
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS user_unread_{name} ON notifications.notifications")
+        op.execute(f"DROP FUNCTION IF EXISTS notifications.user_unread_on_{name}()")
+    op.drop_table('user_unread', schema='notifications')
@@ -1,23 +1,34 @@
 """
 API routes for configuration
 """
-from typing import Dict, Any
-
-from fastapi import APIRouter, Depends
+import orjson
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services import ConfigurationService
+from app.core.config import settings
 from app.core.dependencies import get_db
 
 router = APIRouter(prefix="/config", tags=["configuration"])
 
+# The UI configuration is a literal that only changes with a deploy; severity
+# levels and event types are database rows, cached no longer than the server does
+_STATIC_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+_DB_CACHE_HEADERS = {"Cache-Control": f"max-age={settings.CONFIG_CACHE_TTL}"}
+_UI_CONFIG_JSON = orjson.dumps(ConfigurationService.get_ui_config())
+
+
+def _json_response(content: bytes, headers: dict = _DB_CACHE_HEADERS) -> Response:
+    """Wrap pre-encoded configuration JSON in a cacheable response"""
+    return Response(content=content, media_type="application/json", headers=headers)
+
 
 @router.get(
     "/severity-levels",
     summary="Get severity levels configuration",
     description="Get available notification severity levels with their display configuration",
 )
-async def get_severity_levels(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
+async def get_severity_levels(db: AsyncSession = Depends(get_db)) -> Response:
     """
     Get available notification severity levels with their display configuration.
     
@@ -25,7 +36,7 @@ async def get_severity_levels(db: AsyncSession = Depends(get_db)) -> Dict[str, A
     including display labels, descriptions, Bootstrap CSS classes, and priority ordering.
     """
     service = ConfigurationService(db)
-    return await service.get_severity_levels()
+    return _json_response(await service.get_severity_levels_json())
 
 
 @router.get(
@@ -33,7 +44,7 @@ async def get_severity_levels(db: AsyncSession = Depends(get_db)) -> Dict[str, A
     summary="Get event types configuration", 
     description="Get available event types for filtering and subscription",
 )
-async def get_event_types(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
+async def get_event_types(db: AsyncSession = Depends(get_db)) -> Response:
     """
     Get available event types for filtering and subscription.
     
@@ -41,7 +52,7 @@ async def get_event_types(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     with display labels and descriptions.
     """
     service = ConfigurationService(db)
-    return await service.get_event_types()
+    return _json_response(await service.get_event_types_json())
 
 
 @router.get(
@@ -49,11 +60,11 @@ async def get_event_types(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     summary="Get UI configuration",
     description="Get UI configuration including help text and customizable content",
 )
-async def get_ui_config() -> Dict[str, Any]:
+async def get_ui_config() -> Response:
     """
     Get UI configuration including help text and customizable content.
     
     This endpoint provides configuration for frontend UI components,
     including help text, feature descriptions, and display settings.
     """
-    return ConfigurationService.get_ui_config()
+    return _json_response(_UI_CONFIG_JSON, _STATIC_CACHE_HEADERS)
@@ -5,6 +5,7 @@ from typing import List, Optional
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas import NotificationResponse, BulkMarkAsReadRequest, BulkMarkAsReadResponse
@@ -38,6 +39,7 @@ async def get_notifications(
     
     This endpoint supports comprehensive filtering and pagination for user notifications.
     Notifications are returned in descending chronological order (newest first).
+    Rows are encoded straight to JSON without building ORM objects or Pydantic models.
     """
     service = NotificationService(db)
     
@@ -57,7 +59,8 @@ async def get_notifications(
     if search:
         filters['search'] = search
     
-    return await service.get_notifications(user_id, limit, offset, **filters)
+    rows = await service.get_notification_rows(user_id, limit, offset, **filters)
+    return ORJSONResponse(rows)
 
 
 @router.post(
@@ -3,7 +3,7 @@ API routes for objects
 """
 from typing import List, Dict, Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services import SystemService
@@ -41,4 +41,7 @@ async def get_object_hierarchy(db: AsyncSession = Depends(get_db)) -> List[Dict[
     - Automatically builds parent-child relationships
     """
     service = SystemService(db)
-    return await service.get_object_hierarchy()
+    return Response(
+        content=await service.get_object_hierarchy_json(),
+        media_type="application/json",
+    )
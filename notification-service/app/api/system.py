@@ -4,11 +4,13 @@ API routes for system operations
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from schemas import NotificationResponse
+from schemas import NotificationPageResponse
 from app.services import SystemService
+from app.services.notification_service import decode_cursor
 from app.core.dependencies import get_db
 
 router = APIRouter(prefix="/system", tags=["system"])
@@ -16,7 +18,7 @@ router = APIRouter(prefix="/system", tags=["system"])
 
 @router.get(
     "/notifications", 
-    response_model=List[NotificationResponse],
+    response_model=NotificationPageResponse,
     summary="Get all system notifications",
     description="Retrieve all notifications in the system for monitoring and debugging purposes",
 )
@@ -29,15 +31,23 @@ async def get_all_notifications(
     is_read: Optional[bool] = Query(None, description="Filter by read status"),
     search: Optional[str] = Query(None, description="Search in title, content, and object path"),
     limit: int = Query(100, gt=0, le=500, description="Maximum number of notifications to return"),
-    offset: int = Query(0, ge=0, description="Number of notifications to skip"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    offset: int = Query(0, ge=0, description="Number of notifications to skip (prefer cursor)", deprecated=True),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get all notifications in the system for monitoring and debugging purposes.
     
     This endpoint returns notifications for all users and is intended for system monitoring,
-    debugging, and administrative purposes.
+    debugging, and administrative purposes. Rows are streamed to the client as they are
+    read from the database instead of being materialized first. Pass the returned
+    next_cursor back as cursor to fetch the following page.
     """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     service = SystemService(db)
     
     filters = {}
@@ -56,7 +66,10 @@ async def get_all_notifications(
     if search:
         filters['search'] = search
     
-    return await service.get_all_notifications(limit, offset, **filters)
+    return StreamingResponse(
+        service.stream_all_notifications(limit, offset, after, **filters),
+        media_type="application/json",
+    )
 
 
 @router.get(
@@ -72,7 +85,10 @@ async def get_object_hierarchy(db: AsyncSession = Depends(get_db)) -> List[Dict[
     a hierarchical tree structure of objects in the system.
     """
     service = SystemService(db)
-    return await service.get_object_hierarchy()
+    return Response(
+        content=await service.get_object_hierarchy_json(),
+        media_type="application/json",
+    )
 
 
 @router.get(
@@ -7,7 +7,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import get_async_session
 
 
-# Database dependency
+# Database dependency: one session per request, returned to the pool when the
+# request (including any streamed response body) finishes. Read paths do not
+# commit; long-lived handlers such as WebSockets must not depend on it.
 async def get_db():
     async with get_async_session() as session:
         yield session
@@ -1,8 +1,6 @@
 """
 Main application entry point
 """
-import asyncio
-import json
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -10,12 +8,17 @@ from contextlib import asynccontextmanager
 import nats
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import text
 
 from models import Base
-from app.core.config import settings, engine
+from app.core.config import settings, engine, get_async_session
 from app.api.router import api_router
 from app.services.event_processor import EventProcessor
+from app.services.subscription_cache import subscription_cache
+from app.services.subscription_index import subscription_index
+from app.services.system_event_writer import system_event_writer
+from app.services.websocket_hub import websocket_hub
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +40,7 @@ async def lifespan(app: FastAPI):
     
     # Startup
     logger.info("Starting up notification service...")
+    settings.validate()
     
     # Run Alembic migrations to set up database schema and data
     import subprocess
@@ -61,26 +65,57 @@ async def lifespan(app: FastAPI):
     
     # Connect to NATS
     try:
-        nc = await nats.connect(settings.NATS_URL)
+        # Change messages sent while disconnected are lost, so rebuild the
+        # subscription index after every reconnect
+        nc = await nats.connect(
+            settings.NATS_URL, reconnected_cb=subscription_index.reload
+        )
         js = nc.jetstream()
         logger.info("Connected to NATS")
         
         # Ensure streams exist
-        try:
+        streams = {
             # For application events
-            await js.add_stream(name="EVENTS", subjects=["app.events.>"])
+            "EVENTS": ["app.events.>"],
             # For user notifications
-            await js.add_stream(name="NOTIFICATIONS", subjects=["notification.>"])
+            "NOTIFICATIONS": ["notification.>"],
+            # For monitoring-only system events (SYSTEM_EVENT_SINK=nats)
+            "SYSTEM_EVENTS": ["system.events.>"],
+        }
+        for stream_name, subjects in streams.items():
+            try:
+                await js.add_stream(name=stream_name, subjects=subjects)
+            except Exception as e:
+                logger.warning(f"Stream {stream_name} already exists or error: {e}")
+        
+        # Load the subscription index used for event fan-out; subscribe to
+        # changes first so none are missed while loading. If loading fails,
+        # events fall back to database lookups until a reload succeeds
+        await subscription_index.attach(nc)
+        try:
+            async with get_async_session() as db:
+                await subscription_index.load(db)
         except Exception as e:
-            logger.warning(f"Stream already exists or error: {e}")
+            logger.error(f"Failed to load subscription index: {e}")
+        subscription_index.start_periodic_reload(settings.SUBSCRIPTION_INDEX_RELOAD_INTERVAL)
+        
+        # Batch system notification writes
+        if settings.SYSTEM_EVENT_SINK == "database":
+            system_event_writer.start()
         
         # Initialize event processor
-        event_processor = EventProcessor(nc)
+        event_processor = EventProcessor(nc, js)
         
         # Subscribe to application events
         await nc.subscribe("app.events.>", cb=event_processor.process_event)
         logger.info("Subscribed to application events")
         
+        # Keep subscription caches coherent across instances
+        await subscription_cache.attach(nc)
+        
+        # Forward user notifications to connected WebSockets
+        await websocket_hub.attach(nc)
+        
     except Exception as e:
         logger.error(f"Failed to connect to NATS: {e}")
     
@@ -92,8 +127,11 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down notification service...")
     
     if nc:
+        await websocket_hub.detach()
         await nc.close()
     
+    await subscription_index.stop_periodic_reload()
+    await system_event_writer.stop()
     await engine.dispose()
     
     logger.info("Notification service shutdown complete")
@@ -164,6 +202,7 @@ app = FastAPI(
             "description": "Real-time notification streaming via WebSocket connections.",
         },
     ],
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -197,41 +236,22 @@ async def websocket_notifications(websocket: WebSocket, user_id: str):
     When a user subscribes to this endpoint, they will receive notifications as they are created.
     """
     await websocket.accept()
+    websocket_hub.register(user_id, websocket)
     
     try:
-        if nc:
-            # Subscribe to user-specific notification channel
-            sub = await nc.subscribe(f"notification.user.{user_id}")
-            
-            async def message_handler():
-                try:
-                    async for msg in sub.messages:
-                        notification_data = json.loads(msg.data.decode())
-                        await websocket.send_text(json.dumps(notification_data))
-                except Exception as e:
-                    logger.error(f"Error in WebSocket message handler: {e}")
-                    return
-            
-            # Start message handling task
-            task = asyncio.create_task(message_handler())
-            
-            # Keep connection alive
-            while True:
-                try:
-                    await websocket.receive_text()
-                except WebSocketDisconnect:
-                    break
-                except Exception as e:
-                    logger.error(f"WebSocket error: {e}")
-                    break
-            
-            # Cleanup
-            task.cancel()
-            await sub.unsubscribe()
-            
+        # Keep connection alive; notifications are pushed by the hub
+        while True:
+            try:
+                await websocket.receive_text()
+            except WebSocketDisconnect:
+                break
+            except Exception as e:
+                logger.error(f"WebSocket error: {e}")
+                break
     except Exception as e:
         logger.error(f"WebSocket connection error: {e}")
     finally:
+        websocket_hub.unregister(user_id, websocket)
         try:
             await websocket.close()
         except:
@@ -4,6 +4,7 @@ Repository layer initialization
 from .notification_repository import (
     SeverityLevelRepository,
     EventTypeRepository,
+    EventPayloadRepository,
     NotificationRepository,
     SubscriptionRepository,
 )
@@ -11,6 +12,7 @@ from .notification_repository import (
 __all__ = [
     "SeverityLevelRepository",
     "EventTypeRepository", 
+    "EventPayloadRepository",
     "NotificationRepository",
     "SubscriptionRepository",
 ]
@@ -1,11 +1,11 @@
 """
 Repository layer for database access
 """
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import SeverityLevel, EventType, Notification, NotificationSubscription
+from models import SeverityLevel, EventType, Notification, NotificationSubscription, EventPayload, UserUnread
 
 
 class SeverityLevelRepository:
@@ -54,6 +54,26 @@ class EventTypeRepository:
         return result.scalar_one_or_none()
 
 
+class EventPayloadRepository:
+    """Repository for event payload operations"""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def create(self, event_payload: EventPayload) -> EventPayload:
+        """Stage an event payload; it is committed together with its notifications"""
+        self.session.add(event_payload)
+        await self.session.flush()
+        return event_payload
+    
+    async def get_payloads(self, payload_ids: Iterable[str]) -> Dict[str, Any]:
+        """Get the payloads for a set of IDs in one query, keyed by ID"""
+        result = await self.session.execute(
+            select(EventPayload.id, EventPayload.payload).filter(EventPayload.id.in_(list(payload_ids)))
+        )
+        return dict(result.tuples().all())
+
+
 class NotificationRepository:
     """Repository for notification operations"""
     
@@ -66,21 +86,15 @@ class NotificationRepository:
         await self.session.commit()
         return notification
     
-    async def get_by_user_id(
-        self, 
-        user_id: str, 
-        limit: int = 50, 
-        offset: int = 0,
-        **filters
-    ) -> List[Notification]:
-        """Get notifications for a user with optional filters"""
-        query = (
-            select(Notification)
-            .filter(Notification.user_id == user_id)
-            .order_by(Notification.timestamp.desc())
-        )
-        
-        # Apply filters
+    async def create_many(self, notifications: List[Notification]) -> List[Notification]:
+        """Create several notifications in one multi-row INSERT and commit"""
+        self.session.add_all(notifications)
+        await self.session.commit()
+        return notifications
+    
+    @staticmethod
+    def _apply_filters(query, **filters):
+        """Apply the optional notification filters to a query"""
         if filters.get('path'):
             query = query.filter(Notification.object_path == filters['path'])
         if filters.get('event_type'):
@@ -102,10 +116,44 @@ class NotificationRepository:
                     Notification.content.ilike(search_pattern),
                 )
             )
+        return query
+    
+    async def get_by_user_id(
+        self, 
+        user_id: str, 
+        limit: int = 50, 
+        offset: int = 0,
+        **filters
+    ) -> List[Notification]:
+        """Get notifications for a user with optional filters"""
+        query = (
+            select(Notification)
+            .filter(Notification.user_id == user_id)
+            .order_by(Notification.timestamp.desc())
+        )
+        query = self._apply_filters(query, **filters)
         
         result = await self.session.execute(query.offset(offset).limit(limit))
         return result.scalars().all()
     
+    async def get_rows_by_user_id(
+        self, 
+        user_id: str, 
+        limit: int = 50, 
+        offset: int = 0,
+        **filters
+    ) -> List[Dict[str, Any]]:
+        """Get notifications for a user as plain column mappings, skipping ORM objects"""
+        query = (
+            select(*Notification.__table__.columns)
+            .filter(Notification.user_id == user_id)
+            .order_by(Notification.timestamp.desc())
+        )
+        query = self._apply_filters(query, **filters)
+        
+        result = await self.session.execute(query.offset(offset).limit(limit))
+        return [dict(row) for row in result.mappings()]
+    
     async def get_count_by_user_id(
         self, 
         user_id: str,
@@ -120,31 +168,18 @@ class NotificationRepository:
         )
         
         # Apply the same filters as get_by_user_id
-        if filters.get('path'):
-            query = query.filter(Notification.object_path == filters['path'])
-        if filters.get('event_type'):
-            query = query.filter(Notification.type == filters['event_type'])
-        if filters.get('severity'):
-            query = query.filter(Notification.severity == filters['severity'])
-        if filters.get('from_date'):
-            query = query.filter(Notification.timestamp >= filters['from_date'])
-        if filters.get('to_date'):
-            query = query.filter(Notification.timestamp <= filters['to_date'])
-        if filters.get('is_read') is not None:
-            query = query.filter(Notification.is_read == filters['is_read'])
-        if filters.get('search'):
-            from sqlalchemy import or_
-            search_pattern = f"%{filters['search']}%"
-            query = query.filter(
-                or_(
-                    Notification.title.ilike(search_pattern),
-                    Notification.content.ilike(search_pattern),
-                )
-            )
+        query = self._apply_filters(query, **filters)
         
         result = await self.session.execute(query)
         return result.scalar() or 0
     
+    async def get_unread_count(self, user_id: str) -> int:
+        """Get the trigger-maintained unread count for a user"""
+        result = await self.session.execute(
+            select(UserUnread.unread_count).filter(UserUnread.user_id == user_id)
+        )
+        return result.scalar() or 0
+    
     async def get_by_id(self, notification_id: str, user_id: str) -> Optional[Notification]:
         """Get notification by ID for a specific user"""
         result = await self.session.execute(
@@ -164,8 +199,8 @@ class NotificationRepository:
             return True
         return False
     
-    async def bulk_mark_as_read(self, notification_ids: List[str], user_id: str) -> int:
-        """Mark multiple notifications as read"""
+    async def bulk_mark_as_read(self, notification_ids: List[str], user_id: str) -> List[str]:
+        """Mark multiple notifications as read and return the IDs that changed"""
         from sqlalchemy import update, and_
         result = await self.session.execute(
             update(Notification)
@@ -177,9 +212,11 @@ class NotificationRepository:
                 )
             )
             .values(is_read=True)
+            .returning(Notification.id)
         )
+        updated_ids = list(result.scalars())
         await self.session.commit()
-        return result.rowcount
+        return updated_ids
 
 
 class SubscriptionRepository:
@@ -194,6 +231,33 @@ class SubscriptionRepository:
         await self.session.commit()
         return subscription
     
+    async def upsert(self, subscription: NotificationSubscription) -> NotificationSubscription:
+        """Create a subscription or update the existing one for the same user and path"""
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        
+        insert_stmt = pg_insert(NotificationSubscription).values(
+            id=subscription.id,
+            user_id=subscription.user_id,
+            path=subscription.path,
+            include_children=subscription.include_children,
+            notification_types=subscription.notification_types,
+            settings=subscription.settings,
+        )
+        stmt = insert_stmt.on_conflict_do_update(
+            index_elements=['user_id', 'path'],
+            set_={
+                'include_children': insert_stmt.excluded.include_children,
+                'notification_types': insert_stmt.excluded.notification_types,
+                'settings': insert_stmt.excluded.settings,
+            },
+        ).returning(NotificationSubscription)
+        result = await self.session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        )
+        upserted = result.one()
+        await self.session.commit()
+        return upserted
+    
     async def get_by_user_and_path(self, user_id: str, path: str) -> Optional[NotificationSubscription]:
         """Get subscription by user and path"""
         result = await self.session.execute(
@@ -258,8 +322,15 @@ class SubscriptionRepository:
         # Parent subscriptions with include_children=True
         parent_subs = []
         if parent_paths:
+            # Bind the list as one array parameter (= ANY) rather than an IN list,
+            # so the SQL text is identical for every path depth and the prepared
+            # statement can be reused
+            from sqlalchemy import String, any_, bindparam
+            from sqlalchemy.dialects.postgresql import ARRAY
             parent_query = select(NotificationSubscription).filter(
-                NotificationSubscription.path.in_(parent_paths),
+                NotificationSubscription.path == any_(
+                    bindparam('parent_paths', parent_paths, type_=ARRAY(String))
+                ),
                 NotificationSubscription.include_children == True
             )
             parent_result = await self.session.execute(parent_query)
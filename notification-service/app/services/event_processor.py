@@ -1,18 +1,22 @@
 """
 NATS event processing service
 """
-import json
+import asyncio
 import logging
 import uuid
 from datetime import datetime
 from typing import Dict, Any
 
 import nats
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import Notification
 from app.services import NotificationService, SubscriptionService
-from app.core.config import get_async_session
+from app.services.notification_service import get_parent_paths, normalize_path
+from app.core.config import get_async_session, settings
+from app.services.subscription_index import subscription_index
+from app.services.system_event_writer import system_event_writer
 
 logger = logging.getLogger(__name__)
 
@@ -20,13 +24,16 @@ logger = logging.getLogger(__name__)
 class EventProcessor:
     """Processes events from NATS and creates notifications"""
     
-    def __init__(self, nc: nats.NATS):
+    def __init__(self, nc: nats.NATS, js=None):
         self.nc = nc
+        self.js = js
+        # Where the per-event system notification goes: "database", "nats" or "none"
+        self.system_sink = settings.SYSTEM_EVENT_SINK
     
     async def process_event(self, msg):
         """Process events from NATS and create notifications for subscribed users"""
         try:
-            payload = json.loads(msg.data.decode())
+            payload = orjson.loads(msg.data)
             logger.info(f"Processing event: {msg.subject}")
             
             # Extract event details
@@ -38,7 +45,7 @@ class EventProcessor:
                 return
             
             # Normalize path
-            normalized_path = object_path if object_path.startswith('/') else '/' + object_path
+            normalized_path = normalize_path(object_path)
             
             async with get_async_session() as db:
                 subscription_service = SubscriptionService(db)
@@ -52,7 +59,22 @@ class EventProcessor:
                     db, normalized_path, parent_paths, event_type
                 )
                 
+                # Nothing to write: no subscribers and system events go elsewhere
+                if not subscribed_users and self.system_sink != "database":
+                    await self._publish_system_event(normalized_path, event_type, payload)
+                    return
+                
+                # Title, content and severity only depend on the event, so
+                # render them once instead of once per subscriber
+                rendered = await notification_service.render_event(
+                    event_type, normalized_path, payload
+                )
+                
+                # Store the payload once and reference it from every notification
+                payload_ref = await notification_service.store_event_payload(payload)
+                
                 # Process notifications for each subscriber
+                publishes = []
                 for user_id, subscription in subscribed_users.items():
                     try:
                         notification = await notification_service.create_notification(
@@ -61,32 +83,84 @@ class EventProcessor:
                             object_path=normalized_path,
                             payload=payload,
                             subscription_id=subscription.id,
-                            inherited=subscription.path != normalized_path
+                            inherited=subscription.path != normalized_path,
+                            rendered=rendered,
+                            payload_ref=payload_ref
                         )
                         
-                        # Also publish to user's notification channel for real-time updates
-                        notification_data = notification.to_dict()
-                        await self.nc.publish(
+                        # Also publish to user's notification channel for real-time updates.
+                        # The payload is the JSON frame WebSocket clients receive as-is,
+                        # with the payload resolved like in REST responses
+                        frame = notification.to_dict()
+                        frame["extra_data"] = {**frame["extra_data"], "payload": payload}
+                        publishes.append((
                             f"notification.user.{user_id}",
-                            json.dumps(notification_data).encode()
-                        )
+                            orjson.dumps(frame)
+                        ))
                     except Exception as e:
                         logger.error(f"Error creating notification for user {user_id}: {e}")
                 
-                # Create a system-level notification for debugging/monitoring purposes
-                try:
-                    system_notification = await notification_service.create_notification(
-                        user_id="system",  # Special system user for monitoring
-                        event_type=event_type,
-                        object_path=normalized_path,
-                        payload={**payload, "system_event": True}
-                    )
-                except Exception as e:
-                    logger.error(f"Error creating system notification: {e}")
+                await self._publish_notifications(publishes)
+                
+                # Commit the payload row even when no subscriber notification did
+                await db.commit()
+                
+                # Create a system-level notification for debugging/monitoring purposes;
+                # these are buffered and written in batches
+                if self.system_sink == "database":
+                    try:
+                        system_notification = await notification_service.build_notification(
+                            user_id="system",  # Special system user for monitoring
+                            event_type=event_type,
+                            object_path=normalized_path,
+                            payload={**payload, "system_event": True},
+                            rendered=rendered,
+                            payload_ref=payload_ref
+                        )
+                        if system_event_writer.running:
+                            system_event_writer.enqueue(system_notification)
+                        else:
+                            await notification_service.notification_repo.create(system_notification)
+                    except Exception as e:
+                        logger.error(f"Error creating system notification: {e}")
+            
+            await self._publish_system_event(normalized_path, event_type, payload)
                     
         except Exception as e:
             logger.exception(f"Error processing event: {e}")
     
+    async def _publish_notifications(self, publishes: list):
+        """Publish user notifications concurrently, through JetStream when available"""
+        if not publishes:
+            return
+        
+        publish = self.js.publish if self.js else self.nc.publish
+        results = await asyncio.gather(
+            *(publish(subject, data) for subject, data in publishes),
+            return_exceptions=True
+        )
+        for (subject, _), result in zip(publishes, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error publishing notification to {subject}: {result}")
+    
+    async def _publish_system_event(self, path: str, event_type: str, payload: Dict[str, Any]):
+        """Publish a system event to the monitoring stream when the NATS sink is enabled"""
+        if self.system_sink != "nats":
+            return
+        
+        try:
+            await self.nc.publish(
+                f"system.events.{event_type}",
+                orjson.dumps({
+                    "object_path": path,
+                    "event_type": event_type,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "payload": payload,
+                })
+            )
+        except Exception as e:
+            logger.error(f"Error publishing system event: {e}")
+    
     async def _get_subscribed_users(
         self, 
         db: AsyncSession, 
@@ -95,12 +169,14 @@ class EventProcessor:
         event_type: str
     ) -> Dict[str, Any]:
         """Get all users subscribed to a path"""
-        from app.repositories import SubscriptionRepository
-        
-        subscription_repo = SubscriptionRepository(db)
-        
-        # Find direct and parent subscriptions
-        subscriptions = await subscription_repo.get_subscriptions_for_path(path, parent_paths)
+        # Find direct and parent subscriptions, from the in-memory index when available
+        if subscription_index.loaded:
+            subscriptions = subscription_index.match(path)
+        else:
+            from app.repositories import SubscriptionRepository
+            
+            subscription_repo = SubscriptionRepository(db)
+            subscriptions = await subscription_repo.get_subscriptions_for_path(path, parent_paths)
         
         # Filter and deduplicate subscribers
         subscribed_users = {}  # user_id -> subscription
@@ -121,21 +197,4 @@ class EventProcessor:
     
     def _get_parent_paths(self, path: str) -> list:
         """Get all parent paths in order from most specific to most general"""
-        if not path or path == '/':
-            return []
-        
-        # Ensure path starts with / and doesn't end with /
-        norm_path = path if path.startswith('/') else '/' + path
-        norm_path = norm_path[:-1] if norm_path.endswith('/') and len(norm_path) > 1 else norm_path
-        
-        parts = norm_path.split('/')
-        parent_paths = []
-        
-        # Generate all parent paths
-        for i in range(len(parts) - 1, 0, -1):
-            parent_path = '/'.join(parts[:i])
-            if not parent_path:
-                parent_path = '/'
-            parent_paths.append(parent_path)
-        
-        return parent_paths
+        return get_parent_paths(path)
@@ -1,22 +1,235 @@
 """
 Service layer for business logic
 """
+import base64
 import json
+import sys
+import time
 import uuid
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import Notification, NotificationSubscription, SeverityLevel, EventType
+from models import Notification, NotificationSubscription, SeverityLevel, EventType, EventPayload, ObjectPath
 from schemas import SubscriptionCheckResponse, SubscriptionResponse
 from app.repositories import (
     NotificationRepository,
     SubscriptionRepository,
     SeverityLevelRepository,
     EventTypeRepository,
+    EventPayloadRepository,
 )
 from schemas import SubscriptionCreate, SubscriptionCheckResponse, BulkMarkAsReadRequest, BulkMarkAsReadResponse
+from app.core.config import settings
+from app.services.subscription_cache import subscription_cache
+from app.services.subscription_index import subscription_index
+
+
+# Encoded /config responses and event type -> default severity lookups.
+# Both come from rows that rarely change, so they are cached per process for
+# CONFIG_CACHE_TTL seconds: key -> (expires_at, value)
+_config_cache: Dict[str, Tuple[float, Any]] = {}
+
+
+def _config_cache_get(key: str) -> Any:
+    """Get a cached configuration value, or None if missing or expired"""
+    entry = _config_cache.get(key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1]
+
+
+def _config_cache_set(key: str, value: Any) -> None:
+    """Cache a configuration value for CONFIG_CACHE_TTL seconds"""
+    if settings.CONFIG_CACHE_TTL > 0:
+        _config_cache[key] = (time.monotonic() + settings.CONFIG_CACHE_TTL, value)
+
+
+def normalize_path(path: str) -> str:
+    """Ensure a path starts with / and, unless it is the root, doesn't end with /"""
+    if not path:
+        return '/'
+    path = path if path.startswith('/') else '/' + path
+    return path[:-1] if path.endswith('/') and len(path) > 1 else path
+
+
+def get_parent_paths(path: str) -> List[str]:
+    """Get all parent paths in order from most specific to most general"""
+    if not path or path == '/':
+        return []
+    
+    current = normalize_path(path)
+    
+    # Walk up one segment at a time without splitting the path
+    parent_paths = []
+    while True:
+        i = current.rfind('/')
+        if i <= 0:
+            break
+        current = current[:i]
+        parent_paths.append(current)
+    parent_paths.append('/')
+    
+    return parent_paths
+
+
+# Last built object hierarchy, keyed by the state of the object_paths table
+_hierarchy_cache: Dict[str, Any] = {"key": None, "tree": None, "json": None}
+
+
+def _search_document():
+    """Title, content and path joined by spaces, as indexed for trigram search.
+    
+    The separator is rendered inline rather than bound so the expression
+    matches the index definition exactly.
+    """
+    from sqlalchemy import literal_column
+    separator = literal_column("' '")
+    return Notification.title + separator + Notification.content + separator + Notification.object_path
+
+
+def _path_segments(path: Optional[str]) -> Tuple[str, ...]:
+    """Split an object path into its non-empty segments.
+    
+    Segments repeat heavily across paths (/a, /a/b, /a/b/c), so they are
+    interned: one string object per distinct segment, which also makes the
+    equality checks in the hierarchy sweep hit the identity fast path.
+    """
+    if not path:
+        return ()
+    return tuple(sys.intern(seg) for seg in path.split('/') if seg)
+
+
+@lru_cache(maxsize=None)
+def _all_notifications_predicates():
+    """Optional filters of the system notification query, in filter-mask bit order.
+    
+    Each predicate takes its value from a bound parameter, so one statement per
+    combination of active filters can be built once and reused.
+    """
+    from sqlalchemy import bindparam, tuple_
+    
+    columns = Notification.__table__.c
+    return (
+        # Keyset cursor; id breaks timestamp ties so (timestamp, id) is a total order
+        ('after', tuple_(Notification.timestamp, Notification.id) < tuple_(
+            bindparam('after_timestamp', type_=columns.timestamp.type),
+            bindparam('after_id', type_=columns.id.type),
+        )),
+        ('path', Notification.object_path == bindparam('path')),
+        ('event_type', Notification.type == bindparam('event_type')),
+        ('severity', Notification.severity == bindparam('severity')),
+        ('from_date', Notification.timestamp >= bindparam('from_date')),
+        ('to_date', Notification.timestamp <= bindparam('to_date')),
+        ('is_read', Notification.is_read == bindparam('is_read')),
+        # Single predicate over the expression covered by the
+        # notifications_search_trgm GIN index (see migration 0004)
+        ('search', _search_document().ilike(bindparam('search'))),
+    )
+
+
+# Filter mask -> prebuilt system notification statement
+_all_notifications_statements: Dict[int, Any] = {}
+
+
+def _build_all_notifications_statement(mask: int):
+    """Build the system notification statement for one combination of filters"""
+    from sqlalchemy import bindparam, select
+    
+    # Plain columns rather than entities: rows are serialized straight to
+    # JSON, so ORM instances would only be built to be thrown away
+    query = (
+        select(*Notification.__table__.columns)
+        .order_by(Notification.timestamp.desc(), Notification.id.desc())
+    )
+    for bit, (_, predicate) in enumerate(_all_notifications_predicates()):
+        if mask & (1 << bit):
+            query = query.filter(predicate)
+    
+    return query.offset(bindparam('offset')).limit(bindparam('limit'))
+
+
+def encode_cursor(timestamp: datetime, notification_id: str) -> str:
+    """Encode the (timestamp, id) sort key of a notification as a page cursor"""
+    raw = f"{timestamp.isoformat()}|{notification_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a page cursor back into its (timestamp, id) sort key"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, notification_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), notification_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+# Title/content rendering is pure string work that is repeated for every
+# subscriber of an event, so the results are memoized per input.
+_DASH_UNDERSCORE = str.maketrans('-_', '  ')
+
+_TITLE_TEMPLATES = {
+    "created": "New {object} created",
+    "updated": "{object} was updated",
+    "deleted": "{object} was deleted",
+    "commented": "New comment on {object}",
+}
+
+_CONTENT_TEMPLATES = {
+    "created": "{user} created a new {object}",
+    "updated": "{user} updated {object}",
+    "deleted": "{user} deleted {object}",
+    "commented": "{user} commented on {object}: \"{comment}\"",
+}
+
+
+@lru_cache(maxsize=4096)
+def _object_display(path: str) -> str:
+    """Turn the last segment of a path into a display name"""
+    parts = path.strip('/').split('/')
+    object_name = parts[-1] if parts and parts[0] else "item"
+    return object_name.translate(_DASH_UNDERSCORE).title()
+
+
+@lru_cache(maxsize=4096)
+def _format_title(path: str, event_type: str) -> str:
+    """Render a notification title for a path and event type"""
+    object_display = _object_display(path)
+    template = _TITLE_TEMPLATES.get(event_type)
+    if template:
+        return template.format(object=object_display)
+    return f"{event_type.replace('_', ' ').title()} on {object_display}"
+
+
+@lru_cache(maxsize=4096)
+def _format_content(path: str, event_type: str, user_name: str, comment: str) -> str:
+    """Render notification content for a path, event type and acting user"""
+    object_display = _object_display(path)
+    template = _CONTENT_TEMPLATES.get(event_type)
+    if template:
+        return template.format(user=user_name, object=object_display, comment=comment)
+    return f"{user_name} performed {event_type.replace('_', ' ')} on {object_display}"
+
+
+async def _attach_payloads(payload_repo: EventPayloadRepository, rows: List[Dict[str, Any]]) -> None:
+    """Resolve ``extra_data.payload_ref`` into ``extra_data.payload`` for a page of rows"""
+    refs = {
+        row["extra_data"]["payload_ref"]
+        for row in rows
+        if row.get("extra_data") and "payload_ref" in row["extra_data"]
+    }
+    if not refs:
+        return
+    
+    payloads = await payload_repo.get_payloads(refs)
+    for row in rows:
+        extra_data = row.get("extra_data")
+        if extra_data and "payload_ref" in extra_data:
+            row["extra_data"] = {**extra_data, "payload": payloads.get(extra_data["payload_ref"])}
 
 
 class ConfigurationService:
@@ -40,12 +253,41 @@ class ConfigurationService:
             "event_types": [event_type.to_dict() for event_type in event_types]
         }
     
+    async def get_severity_levels_json(self) -> bytes:
+        """Get all active severity levels as encoded JSON"""
+        content = _config_cache_get("severity_levels")
+        if content is None:
+            severity_levels = await self.get_severity_levels()
+            content = orjson.dumps(severity_levels)
+            # An empty list means the tables are not seeded yet; don't pin it
+            if severity_levels["severity_levels"]:
+                _config_cache_set("severity_levels", content)
+        return content
+    
+    async def get_event_types_json(self) -> bytes:
+        """Get all active event types as encoded JSON"""
+        content = _config_cache_get("event_types")
+        if content is None:
+            event_types = await self.get_event_types()
+            content = orjson.dumps(event_types)
+            if event_types["event_types"]:
+                _config_cache_set("event_types", content)
+        return content
+    
     async def get_severity_for_event_type(self, event_type: str) -> str:
         """Get the default severity for an event type"""
+        severity = _config_cache_get(f"severity:{event_type}")
+        if severity is not None:
+            return severity
+        
         event_type_obj = await self.event_type_repo.get_by_id(event_type)
         if event_type_obj and event_type_obj.default_severity_id:
-            return event_type_obj.default_severity_id
-        return "info"  # Default fallback
+            severity = event_type_obj.default_severity_id
+            _config_cache_set(f"severity:{event_type}", severity)
+        else:
+            severity = "info"  # Default fallback, not cached
+        
+        return severity
     
     @staticmethod
     def get_ui_config() -> Dict[str, Any]:
@@ -87,6 +329,7 @@ class NotificationService:
     def __init__(self, session: AsyncSession):
         self.notification_repo = NotificationRepository(session)
         self.subscription_repo = SubscriptionRepository(session)
+        self.payload_repo = EventPayloadRepository(session)
         self.config_service = ConfigurationService(session)
     
     async def get_notifications(
@@ -101,6 +344,20 @@ class NotificationService:
             user_id, limit, offset, **filters
         )
     
+    async def get_notification_rows(
+        self,
+        user_id: str,
+        limit: int = 50,
+        offset: int = 0,
+        **filters
+    ) -> List[Dict[str, Any]]:
+        """Get notifications for a user as plain dicts, ready for JSON encoding"""
+        rows = await self.notification_repo.get_rows_by_user_id(
+            user_id, limit, offset, **filters
+        )
+        await _attach_payloads(self.payload_repo, rows)
+        return rows
+    
     async def mark_as_read(self, notification_id: str, user_id: str) -> bool:
         """Mark a notification as read"""
         return await self.notification_repo.mark_as_read(notification_id, user_id)
@@ -111,7 +368,11 @@ class NotificationService:
         **filters
     ) -> Dict[str, int]:
         """Get notification count for a user with filtering"""
-        count = await self.notification_repo.get_count_by_user_id(user_id, **filters)
+        if filters == {"is_read": False}:
+            # Unread badge: served from the per-user counter
+            count = await self.notification_repo.get_unread_count(user_id)
+        else:
+            count = await self.notification_repo.get_count_by_user_id(user_id, **filters)
         return {"count": count}
     
     async def bulk_mark_as_read(
@@ -123,9 +384,10 @@ class NotificationService:
         if not request.notification_ids:
             raise ValueError("No notification IDs provided")
         
-        updated_count = await self.notification_repo.bulk_mark_as_read(
+        updated_ids = await self.notification_repo.bulk_mark_as_read(
             request.notification_ids, user_id
         )
+        updated_count = len(updated_ids)
         
         return BulkMarkAsReadResponse(
             status="success",
@@ -133,6 +395,27 @@ class NotificationService:
             message=f"{updated_count} notifications marked as read"
         )
     
+    async def store_event_payload(self, payload: Dict[str, Any]) -> str:
+        """Store an event payload once and return its reference"""
+        event_payload = await self.payload_repo.create(
+            EventPayload(id=str(uuid.uuid4()), payload=payload)
+        )
+        return event_payload.id
+    
+    async def render_event(
+        self,
+        event_type: str,
+        object_path: str,
+        payload: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Render the subscriber-independent fields of a notification"""
+        return {
+            "title": self._generate_title(object_path, event_type),
+            "content": self._generate_content(object_path, event_type, payload),
+            "severity": await self.config_service.get_severity_for_event_type(event_type),
+            "action_url": self._generate_action_url(object_path),
+        }
+    
     async def create_notification(
         self,
         user_id: str,
@@ -140,76 +423,81 @@ class NotificationService:
         object_path: str,
         payload: Dict[str, Any],
         subscription_id: Optional[str] = None,
-        inherited: bool = False
+        inherited: bool = False,
+        rendered: Optional[Dict[str, Any]] = None,
+        payload_ref: Optional[str] = None
     ) -> Notification:
         """Create a new notification"""
-        # Get severity from event type
-        severity = await self.config_service.get_severity_for_event_type(event_type)
+        notification = await self.build_notification(
+            user_id=user_id,
+            event_type=event_type,
+            object_path=object_path,
+            payload=payload,
+            subscription_id=subscription_id,
+            inherited=inherited,
+            rendered=rendered,
+            payload_ref=payload_ref
+        )
+        
+        return await self.notification_repo.create(notification)
+    
+    async def build_notification(
+        self,
+        user_id: str,
+        event_type: str,
+        object_path: str,
+        payload: Dict[str, Any],
+        subscription_id: Optional[str] = None,
+        inherited: bool = False,
+        rendered: Optional[Dict[str, Any]] = None,
+        payload_ref: Optional[str] = None
+    ) -> Notification:
+        """Build a new, unsaved notification
+        
+        ``rendered`` may hold the output of ``render_event`` so that fan-out to
+        many subscribers of the same event renders the text only once.
+        ``payload_ref`` points at a payload stored with ``store_event_payload``;
+        without it the payload is embedded in ``extra_data``.
+        """
+        if rendered is None:
+            rendered = await self.render_event(event_type, object_path, payload)
+        
+        extra_data = {"subscription_path": subscription_id}
+        if payload_ref:
+            extra_data["payload_ref"] = payload_ref
+            if payload.get("system_event"):
+                extra_data["system_event"] = True
+        else:
+            extra_data["payload"] = payload
         
-        notification = Notification(
+        return Notification(
             id=str(uuid.uuid4()),
             user_id=user_id,
             type=event_type,
-            title=self._generate_title(object_path, event_type),
-            content=self._generate_content(object_path, event_type, payload),
-            severity=severity,
-            timestamp=datetime.utcnow(),
+            title=rendered["title"],
+            content=rendered["content"],
+            severity=rendered["severity"],
             is_read=False,
             object_path=object_path,
-            action_url=self._generate_action_url(object_path),
+            action_url=rendered["action_url"],
             subscription_id=subscription_id,
             inherited=inherited,
-            extra_data={
-                "object_path": object_path,
-                "subscription_path": subscription_id,
-                "payload": payload
-            }
+            extra_data=extra_data
         )
-        
-        return await self.notification_repo.create(notification)
     
     def _generate_title(self, path: str, event_type: str) -> str:
         """Generate a title for a notification based on path and event type"""
-        # Extract object name from path
-        parts = path.strip('/').split('/')
-        object_name = parts[-1] if parts else "item"
-        
-        # Capitalize and format for display
-        object_display = object_name.replace('-', ' ').replace('_', ' ').title()
-        
-        if event_type == "created":
-            return f"New {object_display} created"
-        elif event_type == "updated":
-            return f"{object_display} was updated"
-        elif event_type == "deleted":
-            return f"{object_display} was deleted"
-        elif event_type == "commented":
-            return f"New comment on {object_display}"
-        else:
-            return f"{event_type.replace('_', ' ').title()} on {object_display}"
+        return _format_title(path, event_type)
     
     def _generate_content(self, path: str, event_type: str, payload: Dict[str, Any]) -> str:
         """Generate content for a notification"""
-        # Extract object name from path
-        parts = path.strip('/').split('/')
-        object_name = parts[-1] if parts else "item"
-        object_display = object_name.replace('-', ' ').replace('_', ' ').title()
-        
-        # Get data from payload
         data = payload.get("data", {})
-        user_name = data.get("user_name", "Someone")
-        
-        if event_type == "created":
-            return f"{user_name} created a new {object_display}"
-        elif event_type == "updated":
-            return f"{user_name} updated {object_display}"
-        elif event_type == "deleted":
-            return f"{user_name} deleted {object_display}"
-        elif event_type == "commented":
-            comment = data.get("comment", "")
-            return f"{user_name} commented on {object_display}: \"{comment}\""
-        else:
-            return f"{user_name} performed {event_type.replace('_', ' ')} on {object_display}"
+        return _format_content(
+            path,
+            event_type,
+            str(data.get("user_name", "Someone")),
+            str(data.get("comment", "")),
+        )
     
     def _generate_action_url(self, path: str) -> str:
         """Generate a URL for the notification action"""
@@ -232,18 +520,8 @@ class SubscriptionService:
         # Normalize the path
         path = subscription_data.path if subscription_data.path.startswith('/') else '/' + subscription_data.path
         
-        # Check if subscription already exists
-        existing = await self.subscription_repo.get_by_user_and_path(user_id, path)
-        
-        if existing:
-            # Update existing
-            existing.include_children = subscription_data.include_children
-            existing.notification_types = subscription_data.notification_types
-            existing.settings = subscription_data.settings
-            return await self.subscription_repo.update(existing)
-        
-        # Create new
-        new_subscription = NotificationSubscription(
+        # Insert or update in a single atomic statement
+        subscription = NotificationSubscription(
             id=str(uuid.uuid4()),
             user_id=user_id,
             path=path,
@@ -252,15 +530,27 @@ class SubscriptionService:
             settings=subscription_data.settings,
         )
         
-        return await self.subscription_repo.create(new_subscription)
+        subscription = await self.subscription_repo.upsert(subscription)
+        await subscription_cache.invalidate(user_id)
+        await subscription_index.publish_change("upsert", subscription)
+        return subscription
     
     async def get_subscriptions(
         self, 
         user_id: str, 
         path_prefix: Optional[str] = None
-    ) -> List[NotificationSubscription]:
+    ) -> List[SubscriptionResponse]:
         """Get all subscriptions for a user"""
-        return await self.subscription_repo.get_by_user_id(user_id, path_prefix)
+        subscriptions = subscription_cache.get(user_id)
+        if subscriptions is None:
+            generation = subscription_cache.generation(user_id)
+            rows = await self.subscription_repo.get_by_user_id(user_id)
+            subscriptions = [SubscriptionResponse.model_validate(row) for row in rows]
+            subscription_cache.set(user_id, subscriptions, generation)
+        
+        if path_prefix:
+            return [sub for sub in subscriptions if sub.path.startswith(path_prefix)]
+        return subscriptions
     
     async def delete_subscription(self, subscription_id: str, user_id: str) -> bool:
         """Delete a subscription"""
@@ -269,6 +559,8 @@ class SubscriptionService:
             return False
         
         await self.subscription_repo.delete(subscription)
+        await subscription_cache.invalidate(user_id)
+        await subscription_index.publish_change("delete", subscription)
         return True
     
     async def check_subscription(
@@ -307,24 +599,7 @@ class SubscriptionService:
     
     def _get_parent_paths(self, path: str) -> List[str]:
         """Get all parent paths in order from most specific to most general"""
-        if not path or path == '/':
-            return []
-        
-        # Ensure path starts with / and doesn't end with /
-        norm_path = path if path.startswith('/') else '/' + path
-        norm_path = norm_path[:-1] if norm_path.endswith('/') and len(norm_path) > 1 else norm_path
-        
-        parts = norm_path.split('/')
-        parent_paths = []
-        
-        # Generate all parent paths
-        for i in range(len(parts) - 1, 0, -1):
-            parent_path = '/'.join(parts[:i])
-            if not parent_path:
-                parent_path = '/'
-            parent_paths.append(parent_path)
-        
-        return parent_paths
+        return get_parent_paths(path)
 
 
 class SystemService:
@@ -333,106 +608,158 @@ class SystemService:
     def __init__(self, session: AsyncSession):
         self.notification_repo = NotificationRepository(session)
         self.subscription_repo = SubscriptionRepository(session)
+        self.payload_repo = EventPayloadRepository(session)
+    
+    def _all_notifications_query(
+        self,
+        limit: int,
+        offset: int,
+        after: Optional[Tuple[datetime, str]] = None,
+        **filters
+    ):
+        """Get the statement and bound parameters for a page of all notifications"""
+        params = {"limit": limit, "offset": offset}
+        # Bit i of the mask is set when the i-th predicate is active
+        mask = 0
+        for bit, (name, _) in enumerate(_all_notifications_predicates()):
+            if name == 'after':
+                if not after:
+                    continue
+                params['after_timestamp'], params['after_id'] = after
+            elif name == 'is_read':
+                if filters.get('is_read') is None:
+                    continue
+                params['is_read'] = filters['is_read']
+            elif name == 'search':
+                if not filters.get('search'):
+                    continue
+                params['search'] = f"%{filters['search']}%"
+            else:
+                if not filters.get(name):
+                    continue
+                params[name] = filters[name]
+            mask |= 1 << bit
+        
+        query = _all_notifications_statements.get(mask)
+        if query is None:
+            query = _build_all_notifications_statement(mask)
+            _all_notifications_statements[mask] = query
+        return query, params
     
-    async def get_all_notifications(
+    async def stream_all_notifications(
         self,
         limit: int = 100,
         offset: int = 0,
+        after: Optional[Tuple[datetime, str]] = None,
         **filters
-    ) -> List[Notification]:
-        """Get all notifications in the system for monitoring"""
-        from sqlalchemy import select, or_
-        
-        query = (
-            select(Notification)
-            .order_by(Notification.timestamp.desc())
-        )
+    ) -> AsyncIterator[bytes]:
+        """Stream a page of all notifications as JSON, chunk by chunk.
         
-        # Apply filters
-        if filters.get('path'):
-            query = query.filter(Notification.object_path == filters['path'])
-        if filters.get('event_type'):
-            query = query.filter(Notification.type == filters['event_type'])
-        if filters.get('severity'):
-            query = query.filter(Notification.severity == filters['severity'])
-        if filters.get('from_date'):
-            query = query.filter(Notification.timestamp >= filters['from_date'])
-        if filters.get('to_date'):
-            query = query.filter(Notification.timestamp <= filters['to_date'])
-        if filters.get('is_read') is not None:
-            query = query.filter(Notification.is_read == filters['is_read'])
-        if filters.get('search'):
-            search_pattern = f"%{filters['search']}%"
-            query = query.filter(
-                or_(
-                    Notification.title.ilike(search_pattern),
-                    Notification.content.ilike(search_pattern),
-                    Notification.object_path.ilike(search_pattern)
-                )
-            )
+        The items array is followed by the paging fields, which are only
+        known once the last row has been read.
+        """
+        # One extra row tells whether another page exists without a COUNT query
+        query, params = self._all_notifications_query(limit + 1, offset, after, **filters)
         
-        # Apply pagination
-        query = query.offset(offset).limit(limit)
-        
-        # Execute query
         session = self.notification_repo.session
-        result = await session.execute(query)
-        return result.scalars().all()
+        result = await session.stream(query, params, execution_options={"yield_per": 500})
+        
+        # One chunk per fetched batch of rows rather than per row, which keeps
+        # the number of body messages sent to the client small
+        count = 0
+        last = None
+        has_more = False
+        async for partition in result.mappings().partitions():
+            rows = [dict(row) for row in partition[:limit - count]]
+            has_more = has_more or len(partition) > len(rows)
+            if not rows:
+                continue
+            await _attach_payloads(self.payload_repo, rows)
+            body = b",".join([orjson.dumps(row) for row in rows])
+            yield (b"," if count else b'{"items":[') + body
+            count += len(rows)
+            last = rows[-1]
+        
+        next_cursor = encode_cursor(last["timestamp"], last["id"]) if has_more else None
+        closing = b"]," if count else b'{"items":[],'
+        yield closing + orjson.dumps({"next_cursor": next_cursor, "has_more": has_more})[1:]
     
     async def get_object_hierarchy(self) -> List[Dict[str, Any]]:
         """Get the hierarchical structure of all objects"""
-        from sqlalchemy import select
+        await self._refresh_hierarchy_cache()
+        return _hierarchy_cache["tree"]
+    
+    async def get_object_hierarchy_json(self) -> bytes:
+        """Get the object hierarchy as pre-encoded JSON"""
+        await self._refresh_hierarchy_cache()
+        return _hierarchy_cache["json"]
+    
+    async def _refresh_hierarchy_cache(self) -> None:
+        """Rebuild the cached hierarchy if the set of known paths has changed"""
+        from sqlalchemy import select, func
         
-        # Get all unique object paths from notifications and subscriptions
         session = self.notification_repo.session
         
-        notification_paths_query = select(Notification.object_path).distinct()
-        subscription_paths_query = select(NotificationSubscription.path).distinct()
-        
-        notification_result = await session.execute(notification_paths_query)
-        subscription_result = await session.execute(subscription_paths_query)
-        
-        notification_paths = {path for (path,) in notification_result.fetchall()}
-        subscription_paths = {path for (path,) in subscription_result.fetchall()}
-        
-        # Combine all paths
-        all_paths = notification_paths.union(subscription_paths)
-        
-        # Build hierarchical structure
-        hierarchy = {}
-        
-        for path in all_paths:
-            # Skip empty paths
-            if not path or path == '/':
-                continue
-                
-            # Split path into segments
-            segments = [seg for seg in path.split('/') if seg]
+        # Row count changes on deletes, max(updated_at) on new paths
+        result = await session.execute(
+            select(func.count(), func.max(ObjectPath.updated_at))
+        )
+        key = tuple(result.one())
+        if _hierarchy_cache["key"] == key and _hierarchy_cache["tree"] is not None:
+            return
+        
+        # Distinct paths from notifications and subscriptions, kept by triggers.
+        # Read through a server-side cursor and split as rows arrive, so only
+        # the segment tuples are held, not a buffered result set as well
+        paths = await session.stream_scalars(
+            select(ObjectPath.path).execution_options(yield_per=1000)
+        )
+        segmented = []
+        async for path in paths:
+            segments = _path_segments(path)
+            if segments:
+                segmented.append(segments)
+        segmented.sort()
+        tree = self._sweep_hierarchy(segmented)
+        
+        _hierarchy_cache.update(key=key, tree=tree, json=orjson.dumps(tree))
+    
+    @staticmethod
+    def _build_hierarchy(all_paths) -> List[Dict[str, Any]]:
+        """Build the nested path tree expected by the frontend"""
+        segmented = [segments for segments in map(_path_segments, all_paths) if segments]
+        segmented.sort()
+        return SystemService._sweep_hierarchy(segmented)
+    
+    @staticmethod
+    def _sweep_hierarchy(segmented: List[Tuple[str, ...]]) -> List[Dict[str, Any]]:
+        """Build the path tree from segment tuples in sorted order.
+        
+        Sorting by segments (not raw strings) keeps siblings ordered by name
+        and guarantees every node's descendants follow it contiguously.
+        """
+        result: List[Dict[str, Any]] = []
+        # stack[i] holds the path and children list of the node at depth i;
+        # node paths are built once from their parent's, never re-joined
+        stack = [('', result)]
+        previous: Tuple[str, ...] = ()
+        
+        for segments in segmented:
+            # Length of the prefix shared with the previous path
+            common = 0
+            for prev_seg, seg in zip(previous, segments):
+                if prev_seg != seg:
+                    break
+                common += 1
             
-            # Build the hierarchy
-            current_level = hierarchy
-            current_path = ''
+            del stack[common + 1:]
             
-            for segment in segments:
-                current_path += '/' + segment
-                
-                if segment not in current_level:
-                    current_level[segment] = {
-                        'path': current_path,
-                        'children': {}
-                    }
-                
-                current_level = current_level[segment]['children']
-        
-        # Convert to the format expected by the frontend
-        def build_tree(node_dict):
-            result = []
-            for key, value in sorted(node_dict.items()):
-                node = {
-                    'path': value['path'],
-                    'children': build_tree(value['children']) if value['children'] else []
-                }
-                result.append(node)
-            return result
+            for segment in segments[common:]:
+                parent_path, siblings = stack[-1]
+                node = {'path': parent_path + '/' + segment, 'children': []}
+                siblings.append(node)
+                stack.append((node['path'], node['children']))
+            
+            previous = segments
         
-        return build_tree(hierarchy)
+        return result
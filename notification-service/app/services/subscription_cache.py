@@ -0,0 +1,116 @@
+"""
+In-process read-through cache for user subscription lists
+"""
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from schemas import SubscriptionResponse
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionCache:
+    """TTL cache of subscription lists keyed by user ID.
+    
+    Entries are dropped locally when a user's subscriptions change and the
+    change is broadcast on ``sub.invalidate.{user_id}`` so that other service
+    instances drop their copy as well.
+    
+    Invalidations are numbered by a cache-wide generation counter. Callers
+    read the generation before loading from the database and pass it to
+    ``set``, which ignores the write if the user was invalidated in between;
+    otherwise a list read before a change could be cached for the full TTL.
+    
+    Once the cache holds ``prune_threshold`` users, expired entries and the
+    invalidation records of users without an entry are pruned. Pruned records
+    are summarized by the newest generation among them, so a read that was
+    in flight at that point is conservatively not cached.
+    """
+    
+    SUBJECT_PREFIX = "sub.invalidate"
+    
+    def __init__(self, ttl: int = 300, prune_threshold: int = 1024):
+        self.ttl = ttl
+        self.nc = None
+        self.prune_threshold = prune_threshold
+        self._entries: Dict[str, Tuple[float, List[SubscriptionResponse]]] = {}
+        # user_id -> generation of the user's last invalidation
+        self._invalidated: Dict[str, int] = {}
+        self._generation = 0
+        self._pruned_generation = 0
+        self._prune_at = prune_threshold
+    
+    async def attach(self, nc) -> None:
+        """Listen for invalidations from other instances and publish our own"""
+        self.nc = nc
+        await nc.subscribe(f"{self.SUBJECT_PREFIX}.*", cb=self._on_invalidate)
+    
+    def get(self, user_id: str) -> Optional[List[SubscriptionResponse]]:
+        """Get cached subscriptions for a user, or None on a miss"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        
+        expires_at, subscriptions = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        return subscriptions
+    
+    def generation(self, user_id: str) -> int:
+        """Get the invalidation generation to pass to ``set`` after a miss"""
+        return self._generation
+    
+    def set(self, user_id: str, subscriptions: List[SubscriptionResponse], generation: int) -> None:
+        """Cache subscriptions for a user unless they were invalidated since ``generation``"""
+        if self.ttl <= 0 or generation < self._invalidated.get(user_id, self._pruned_generation):
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl, subscriptions)
+        
+        if len(self._entries) + len(self._invalidated) >= self._prune_at:
+            self._prune()
+    
+    async def invalidate(self, user_id: str) -> None:
+        """Drop a user's entry here and on every other instance"""
+        self._drop(user_id)
+        
+        if self.nc:
+            try:
+                await self.nc.publish(f"{self.SUBJECT_PREFIX}.{user_id}", b"")
+            except Exception as e:
+                logger.error(f"Error publishing subscription invalidation: {e}")
+    
+    async def _on_invalidate(self, msg) -> None:
+        """Handle an invalidation broadcast"""
+        user_id = msg.subject[len(self.SUBJECT_PREFIX) + 1:]
+        self._drop(user_id)
+    
+    def _drop(self, user_id: str) -> None:
+        self._generation += 1
+        self._invalidated[user_id] = self._generation
+        self._entries.pop(user_id, None)
+    
+    def _prune(self) -> None:
+        """Drop expired entries and invalidation records of users without an entry"""
+        now = time.monotonic()
+        self._entries = {
+            user_id: entry for user_id, entry in self._entries.items() if entry[0] >= now
+        }
+        
+        invalidated = {}
+        for user_id, generation in self._invalidated.items():
+            if user_id in self._entries:
+                invalidated[user_id] = generation
+            else:
+                self._pruned_generation = max(self._pruned_generation, generation)
+        self._invalidated = invalidated
+        
+        # Prune again once the cache has doubled, keeping set O(1) amortized
+        self._prune_at = max(
+            self.prune_threshold, 2 * (len(self._entries) + len(self._invalidated))
+        )
+
+
+subscription_cache = SubscriptionCache(settings.SUBSCRIPTION_CACHE_TTL)
@@ -0,0 +1,196 @@
+"""
+In-process subscription index used for event fan-out
+"""
+import asyncio
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Collection, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import NotificationSubscription
+from app.core.config import get_async_session
+
+logger = logging.getLogger(__name__)
+
+
+class IndexedSubscription(NamedTuple):
+    """The subscription fields needed to route an event"""
+    id: str
+    user_id: str
+    path: str
+    include_children: bool
+    notification_types: Optional[Collection[str]]
+
+
+@lru_cache(maxsize=1024)
+def _to_filter_set(notification_types: Tuple[str, ...]) -> FrozenSet[str]:
+    """Event type filter as a set; subscriptions with the same types share one"""
+    return frozenset(notification_types)
+
+
+class PathIndex:
+    """Subscriptions keyed by their exact stored path.
+    
+    Matching follows ``SubscriptionRepository.get_subscriptions_for_path``:
+    subscriptions on the normalized event path, plus those with
+    include_children on one of its parent paths, compared as exact strings.
+    A hit is one dict lookup per path level.
+    """
+    
+    def __init__(self):
+        self.by_path: Dict[str, Dict[str, IndexedSubscription]] = {}
+    
+    def add(self, subscription: IndexedSubscription) -> None:
+        # Event types are checked for every matched subscription of every event
+        if subscription.notification_types:
+            subscription = subscription._replace(
+                notification_types=_to_filter_set(tuple(subscription.notification_types))
+            )
+        self.by_path.setdefault(subscription.path, {})[subscription.id] = subscription
+    
+    def remove(self, subscription_id: str, path: str) -> None:
+        subscriptions = self.by_path.get(path)
+        if subscriptions is None:
+            return
+        subscriptions.pop(subscription_id, None)
+        if not subscriptions:
+            del self.by_path[path]
+    
+    def match(self, path: str) -> List[IndexedSubscription]:
+        """Direct subscriptions on ``path`` plus ancestors with include_children"""
+        from app.services.notification_service import get_parent_paths, normalize_path
+        
+        path = normalize_path(path)
+        matches = list(self.by_path.get(path, {}).values())
+        for parent_path in get_parent_paths(path):
+            subscriptions = self.by_path.get(parent_path)
+            if subscriptions:
+                matches.extend(sub for sub in subscriptions.values() if sub.include_children)
+        return matches
+
+
+class SubscriptionIndex:
+    """Process-wide subscription index kept current through ``sub.changed``.
+    
+    Every instance loads all subscriptions at startup and applies the change
+    messages published after each subscription create, update or delete.
+    Those are core NATS messages and can be lost, e.g. across a reconnect, so
+    the index is also rebuilt after reconnecting and periodically.
+    Until it is loaded, callers fall back to querying the database.
+    """
+    
+    SUBJECT = "sub.changed"
+    
+    def __init__(self):
+        self.paths = PathIndex()
+        self.loaded = False
+        self.nc = None
+        self._pending: Optional[List[Dict[str, Any]]] = None
+        self._reload_task: Optional[asyncio.Task] = None
+    
+    async def attach(self, nc) -> None:
+        """Subscribe to change messages from all instances"""
+        self.nc = nc
+        await nc.subscribe(self.SUBJECT, cb=self._on_change)
+    
+    async def load(self, session: AsyncSession) -> None:
+        """Build the index from all stored subscriptions"""
+        # Changes that arrive while the snapshot is read are replayed on top of it
+        self._pending = []
+        try:
+            result = await session.execute(select(NotificationSubscription))
+            paths = PathIndex()
+            for subscription in result.scalars():
+                paths.add(self._entry(subscription))
+            
+            self.paths = paths
+            for change in self._pending:
+                self._apply_to_index(change)
+        finally:
+            self._pending = None
+        
+        self.loaded = True
+        logger.info("Subscription index loaded")
+    
+    async def reload(self) -> None:
+        """Rebuild the index from the database, keeping the current one on failure"""
+        if self._pending is not None:
+            return  # A load is already in progress
+        try:
+            async with get_async_session() as db:
+                await self.load(db)
+        except Exception as e:
+            logger.error(f"Error reloading subscription index: {e}")
+    
+    def start_periodic_reload(self, interval: float) -> None:
+        """Rebuild the index every ``interval`` seconds to repair missed changes"""
+        if interval > 0 and self._reload_task is None:
+            self._reload_task = asyncio.create_task(self._reload_periodically(interval))
+    
+    async def stop_periodic_reload(self) -> None:
+        """Stop the periodic rebuild"""
+        if self._reload_task:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+    
+    async def _reload_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.reload()
+    
+    def match(self, path: str) -> List[IndexedSubscription]:
+        """Get subscriptions that would be notified for a given path"""
+        return self.paths.match(path)
+    
+    async def publish_change(self, op: str, subscription: NotificationSubscription) -> None:
+        """Apply a change locally and broadcast it to the other instances"""
+        change = {"op": op, **self._entry(subscription)._asdict()}
+        self._apply(change)
+        
+        if self.nc:
+            try:
+                await self.nc.publish(self.SUBJECT, json.dumps(change).encode())
+            except Exception as e:
+                logger.error(f"Error publishing subscription change: {e}")
+    
+    async def _on_change(self, msg) -> None:
+        try:
+            self._apply(json.loads(msg.data.decode()))
+        except Exception as e:
+            logger.error(f"Error applying subscription change: {e}")
+    
+    def _apply(self, change: Dict[str, Any]) -> None:
+        if self._pending is not None:
+            self._pending.append(change)
+        self._apply_to_index(change)
+    
+    def _apply_to_index(self, change: Dict[str, Any]) -> None:
+        self.paths.remove(change["id"], change["path"])
+        if change["op"] == "upsert":
+            self.paths.add(IndexedSubscription(
+                id=change["id"],
+                user_id=change["user_id"],
+                path=change["path"],
+                include_children=change["include_children"],
+                notification_types=change["notification_types"],
+            ))
+    
+    @staticmethod
+    def _entry(subscription: NotificationSubscription) -> IndexedSubscription:
+        return IndexedSubscription(
+            id=subscription.id,
+            user_id=subscription.user_id,
+            path=subscription.path,
+            include_children=subscription.include_children,
+            notification_types=subscription.notification_types,
+        )
+
+
+subscription_index = SubscriptionIndex()
@@ -0,0 +1,145 @@
+"""
+Batched writer for system notifications
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from models import Notification
+from app.core.config import get_async_session, settings
+from app.repositories import NotificationRepository
+
+logger = logging.getLogger(__name__)
+
+
+class SystemEventWriter:
+    """Buffers system notifications and writes them in batches.
+    
+    Every event produces a system notification, so writing each one in its own
+    INSERT and COMMIT dominates write load under bursty publishers. Notifications
+    are queued instead and a background task flushes whatever accumulated during
+    each ``flush_interval`` window as a single multi-row INSERT. With
+    ``coalesce`` enabled, only the latest notification per (path, event type)
+    within a window is kept.
+    """
+    
+    def __init__(
+        self,
+        flush_interval: float = 0.1,
+        max_queue_size: int = 10000,
+        coalesce: bool = False,
+        max_attempts: int = 3
+    ):
+        self.flush_interval = flush_interval
+        self.coalesce = coalesce
+        self.max_attempts = max_attempts
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        # The batch being collected or written lives here rather than in the
+        # task, so stopping mid-window cannot lose it
+        self._pending: List[Notification] = []
+        self._failures = 0
+        self._writing = False
+        self._stopping = False
+        self._last_timestamp: Optional[datetime] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Start the background flush task"""
+        if not self.running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the background task and write anything still pending or queued"""
+        if self._task:
+            self._stopping = True
+            # A write in progress is left to finish; the loop exits after it
+            if not self._writing:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._pending.extend(self._drain())
+        await self._write_pending(final=True)
+    
+    def enqueue(self, notification: Notification) -> None:
+        """Queue a system notification for the next batch"""
+        # Stamp the event time now: a database default would give the whole
+        # batch one commit time, late by the flush window, and the system log
+        # would then order the batch by its random IDs. Timestamps are kept
+        # strictly increasing so arrival order survives equal clock readings.
+        if notification.timestamp is None:
+            timestamp = datetime.utcnow()
+            if self._last_timestamp is not None and timestamp <= self._last_timestamp:
+                timestamp = self._last_timestamp + timedelta(microseconds=1)
+            notification.timestamp = timestamp
+            self._last_timestamp = timestamp
+        try:
+            self._queue.put_nowait(notification)
+        except asyncio.QueueFull:
+            logger.warning("System notification queue is full, dropping notification")
+    
+    async def _run(self) -> None:
+        while not self._stopping:
+            if not self._pending:
+                self._pending.append(await self._queue.get())
+            await asyncio.sleep(self.flush_interval)
+            self._pending.extend(self._drain())
+            self._writing = True
+            try:
+                await self._write_pending()
+            finally:
+                self._writing = False
+    
+    async def _write_pending(self, final: bool = False) -> None:
+        """Write the pending batch, keeping it for the next window if that fails"""
+        batch = self._pending
+        try:
+            await self._flush(batch)
+        except Exception as e:
+            self._failures += 1
+            if not final and self._failures < self.max_attempts:
+                logger.warning(
+                    f"Error writing {len(batch)} system notifications "
+                    f"(attempt {self._failures}), will retry: {e}"
+                )
+                return
+            logger.error(
+                f"Dropping {len(batch)} system notifications after "
+                f"{self._failures} failed writes: {e}; ids={[n.id for n in batch]}"
+            )
+        self._pending = []
+        self._failures = 0
+    
+    def _drain(self) -> List[Notification]:
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+    
+    async def _flush(self, batch: List[Notification]) -> None:
+        if not batch:
+            return
+        
+        if self.coalesce:
+            latest: Dict[Tuple[str, str], Notification] = {}
+            for notification in batch:
+                latest[(notification.object_path, notification.type)] = notification
+            batch = list(latest.values())
+        
+        async with get_async_session() as db:
+            await NotificationRepository(db).create_many(batch)
+        logger.debug(f"Wrote {len(batch)} system notifications")
+
+
+system_event_writer = SystemEventWriter(
+    flush_interval=settings.SYSTEM_EVENT_FLUSH_INTERVAL,
+    coalesce=settings.SYSTEM_EVENT_COALESCE,
+)
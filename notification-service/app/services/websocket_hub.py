@@ -0,0 +1,130 @@
+"""
+Fan-out of user notifications from NATS to connected WebSockets
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Outbox:
+    """Bounded send queue and sender task for one WebSocket"""
+    
+    # Minimum seconds between drop reports for one socket
+    REPORT_INTERVAL = 10.0
+    
+    def __init__(self, websocket: WebSocket, maxsize: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._reported = 0
+        self._reported_at: Optional[float] = None
+        self.task = asyncio.create_task(self._run())
+    
+    def drops_to_report(self) -> int:
+        """Drops since the last report, if one is due; 0 otherwise.
+        
+        The first drop is reported straight away and later ones at most once
+        per ``REPORT_INTERVAL``, so a slow client cannot flood the log.
+        """
+        now = time.monotonic()
+        if self._reported_at is not None and now - self._reported_at < self.REPORT_INTERVAL:
+            return 0
+        new_drops = self.dropped - self._reported
+        self._reported = self.dropped
+        self._reported_at = now
+        return new_drops
+    
+    def put(self, text: str) -> bool:
+        """Queue a message, dropping the oldest one if full; False if one was dropped"""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(text)
+            self.dropped += 1
+            return False
+    
+    async def _run(self) -> None:
+        """Send queued messages until the socket fails or the task is cancelled"""
+        while True:
+            text = await self.queue.get()
+            try:
+                await self.websocket.send_text(text)
+            except Exception as e:
+                logger.error(f"Error sending notification to WebSocket: {e}")
+                return
+
+
+class WebSocketHub:
+    """Single NATS subscription shared by every WebSocket on this instance.
+    
+    Messages on ``notification.user.{user_id}`` are forwarded unchanged to the
+    sockets registered for that user, so the number of NATS subscriptions no
+    longer grows with the number of open connections. Each socket sends from
+    its own bounded queue so a slow client cannot stall delivery to others.
+    """
+    
+    SUBJECT_PREFIX = "notification.user"
+    
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self.sub = None
+        self._connections: Dict[str, Dict[WebSocket, _Outbox]] = {}
+    
+    async def attach(self, nc) -> None:
+        """Subscribe to notifications for all users"""
+        # No queue group: every instance must see every message, since a
+        # user's sockets may be connected to any of them
+        self.sub = await nc.subscribe(f"{self.SUBJECT_PREFIX}.*", cb=self._on_message)
+    
+    async def detach(self) -> None:
+        """Stop receiving notifications"""
+        if self.sub:
+            await self.sub.unsubscribe()
+            self.sub = None
+    
+    def register(self, user_id: str, websocket: WebSocket) -> None:
+        """Start forwarding a user's notifications to a socket"""
+        outboxes = self._connections.setdefault(user_id, {})
+        if websocket not in outboxes:
+            outboxes[websocket] = _Outbox(websocket, self.queue_size)
+    
+    def unregister(self, user_id: str, websocket: WebSocket) -> None:
+        """Stop forwarding to a socket"""
+        outboxes = self._connections.get(user_id)
+        if outboxes is None:
+            return
+        outbox = outboxes.pop(websocket, None)
+        if outbox is not None:
+            outbox.task.cancel()
+        if not outboxes:
+            del self._connections[user_id]
+    
+    async def _on_message(self, msg) -> None:
+        """Queue a notification for every socket of its user"""
+        user_id = msg.subject[len(self.SUBJECT_PREFIX) + 1:]
+        outboxes = self._connections.get(user_id)
+        if not outboxes:
+            return
+        
+        # Payloads are published as JSON, decode once for all sockets
+        text = msg.data.decode()
+        for outbox in outboxes.values():
+            if not outbox.put(text):
+                new_drops = outbox.drops_to_report()
+                if new_drops:
+                    logger.warning(
+                        f"WebSocket for user {user_id} is not keeping up, dropped "
+                        f"{new_drops} notifications ({outbox.dropped} in total)"
+                    )
+
+
+websocket_hub = WebSocketHub(settings.WS_SEND_QUEUE_SIZE)
@@ -1,21 +1,28 @@
-from datetime import datetime
 import json
-from sqlalchemy import Column, String, Boolean, DateTime, JSON, Text, ForeignKey, MetaData, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, JSON, Text, ForeignKey, MetaData, Integer, UniqueConstraint, Index, text, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 
 # Create base with notifications schema
 metadata = MetaData(schema="notifications")
 Base = declarative_base(metadata=metadata)
 
+# JSONB on PostgreSQL, plain JSON elsewhere (e.g. SQLite in tests)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 class NotificationSubscription(Base):
     __tablename__ = "notification_subscriptions"
-    __table_args__ = {'schema': 'notifications'}
+    __table_args__ = (
+        UniqueConstraint('user_id', 'path', name='uq_notification_subscriptions_user_path'),
+        {'schema': 'notifications'},
+    )
+    __mapper_args__ = {'eager_defaults': True}
     
     id = Column(String, primary_key=True)
     user_id = Column(String, nullable=False, index=True)
     path = Column(String, nullable=False, index=True)
     include_children = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     notification_types = Column(JSON, nullable=True)  # List of event types to subscribe to
     settings = Column(JSON, nullable=True)  # User preferences for this subscription
     
@@ -32,21 +39,31 @@ class NotificationSubscription(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
-    __table_args__ = {'schema': 'notifications'}
+    __table_args__ = (
+        # Filter column + timestamp so ORDER BY timestamp DESC LIMIT n is an index scan
+        Index('ix_notif_user_ts', 'user_id', 'timestamp'),
+        Index('ix_notif_path_ts', 'object_path', 'timestamp'),
+        Index('ix_notif_sev_ts', 'severity', 'timestamp'),
+        Index('ix_notif_unread_user_ts', 'user_id', 'timestamp', postgresql_where=text('is_read = false')),
+        {'schema': 'notifications'},
+    )
+    # Fetch the server-side timestamp on INSERT (RETURNING) so it is
+    # available for publishing without another round trip
+    __mapper_args__ = {'eager_defaults': True}
     
     id = Column(String, primary_key=True)
-    user_id = Column(String, nullable=False, index=True)
+    user_id = Column(String, nullable=False)
     type = Column(String, nullable=False, index=True)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
-    severity = Column(String, nullable=False, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    severity = Column(String, nullable=False)
+    timestamp = Column(DateTime, server_default=func.now(), nullable=False, index=True)
     is_read = Column(Boolean, default=False, nullable=False, index=True)
-    object_path = Column(String, nullable=False, index=True)
+    object_path = Column(String, nullable=False)
     action_url = Column(String, nullable=True)
     subscription_id = Column(String, ForeignKey("notifications.notification_subscriptions.id"), nullable=True)
     inherited = Column(Boolean, default=False, nullable=False)
-    extra_data = Column(JSON, nullable=True)  # Renamed from metadata to avoid SQLAlchemy conflict
+    extra_data = Column(JSONType, nullable=True)  # Renamed from metadata to avoid SQLAlchemy conflict
     
     def to_dict(self):
         return {
@@ -65,6 +82,41 @@ class Notification(Base):
             "extra_data": self.extra_data  # Updated to match new column name
         }
 
+class EventPayload(Base):
+    """Inbound event payload, stored once and shared by all notifications of the event"""
+    __tablename__ = "event_payloads"
+    __table_args__ = {'schema': 'notifications'}
+    
+    id = Column(String, primary_key=True)
+    payload = Column(JSONType, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+class ObjectPath(Base):
+    """Distinct object paths seen in notifications and subscriptions.
+    
+    Maintained by database triggers (see migration 0005) so the object hierarchy
+    can be read without scanning the notifications table.
+    """
+    __tablename__ = "object_paths"
+    __table_args__ = {'schema': 'notifications'}
+    
+    path = Column(String, primary_key=True)
+    subscription_count = Column(Integer, default=0, nullable=False)
+    has_notifications = Column(Boolean, default=False, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+class UserUnread(Base):
+    """Per-user count of unread notifications.
+    
+    Maintained by database triggers (see migration 0008) so the unread badge
+    is a primary key lookup instead of a COUNT over the user's notifications.
+    """
+    __tablename__ = "user_unread"
+    __table_args__ = {'schema': 'notifications'}
+    
+    user_id = Column(String, primary_key=True)
+    unread_count = Column(Integer, default=0, nullable=False)
+
 class SeverityLevel(Base):
     __tablename__ = "severity_levels"
     __table_args__ = {'schema': 'notifications'}
@@ -75,7 +127,7 @@ class SeverityLevel(Base):
     bootstrap_class = Column(String, nullable=False)
     priority = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     
     def to_dict(self):
         return {
@@ -95,7 +147,7 @@ class EventType(Base):
     description = Column(Text, nullable=True)
     default_severity_id = Column(String, ForeignKey("notifications.severity_levels.id"), nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     
     def to_dict(self):
         return {
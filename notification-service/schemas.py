@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 # Subscription schemas
 class SubscriptionCreate(BaseModel):
@@ -18,8 +18,7 @@ class SubscriptionResponse(BaseModel):
     notification_types: Optional[List[str]] = None
     settings: Optional[Dict[str, Any]] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Notification schemas
 class NotificationResponse(BaseModel):
@@ -37,8 +36,12 @@ class NotificationResponse(BaseModel):
     inherited: bool = False
     extra_data: Optional[Dict[str, Any]] = None  # Renamed from metadata
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class NotificationPageResponse(BaseModel):
+    items: List[NotificationResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 # Subscription check response
 class SubscriptionCheckResponse(BaseModel):
@@ -4,8 +4,10 @@ Test configuration and fixtures
 import asyncio
 import pytest
 import pytest_asyncio
-from typing import AsyncGenerator, Generator
+from typing import AsyncGenerator, Dict, Generator
+from unittest.mock import AsyncMock
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 from datetime import datetime
@@ -15,15 +17,59 @@ from app.core.dependencies import get_db
 from models import Base, Notification
 import os
 
+try:
+    import uvloop
+except ImportError:  # optional, e.g. on Windows
+    uvloop = None
+
+
+def pytest_addoption(parser):
+    """Register custom command line options."""
+    parser.addoption(
+        "--fast",
+        action="store_true",
+        default=False,
+        help="skip smoke tests that only exercise the standard library",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the standard library smoke tests under --fast."""
+    if not config.getoption("--fast"):
+        return
+    skip_smoke = pytest.mark.skip(reason="smoke test skipped with --fast")
+    for item in items:
+        if "TestBasicFunctionality" in item.nodeid:
+            item.add_marker(skip_smoke)
+
 
 @pytest.fixture(scope="session")
 def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
-    """Create an event loop for the entire test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
+    """Create an event loop for the entire test session.
+    
+    All async tests share this loop, so none of them pays for loop setup and
+    teardown; the async service tests are mock-only and finish in microseconds.
+    uvloop is used when installed to cut task scheduling overhead.
+    """
+    if uvloop is not None:
+        loop = uvloop.new_event_loop()
+    else:
+        loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
 
 
+@pytest.fixture(scope="session")
+def async_mock_pool() -> Dict[str, AsyncMock]:
+    """Prebuilt AsyncMocks for common return values, reset between tests."""
+    return {
+        "empty_list": AsyncMock(return_value=[]),
+        "true": AsyncMock(return_value=True),
+        "false": AsyncMock(return_value=False),
+        "three": AsyncMock(return_value=3),
+    }
+
+
 @pytest.fixture(scope="session") 
 async def test_engine():
     """Create a test database engine using SQLite."""
@@ -35,6 +81,11 @@ async def test_engine():
         connect_args={"check_same_thread": False}
     )
     
+    # The models live in the notifications schema; SQLite needs it attached
+    @event.listens_for(engine.sync_engine, "connect")
+    def attach_schema(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS notifications")
+    
     # Create tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,172 @@
+"""
+Tests for NATS event processing
+"""
+import orjson
+import pytest
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+from app.core.config import Settings
+from app.services.event_processor import EventProcessor
+from app.services.subscription_index import IndexedSubscription
+from models import Notification
+
+
+def _message(object_path: str = "/projects/test/tasks/1", event_type: str = "updated", **fields):
+    return Mock(
+        subject=f"app.events.{event_type}",
+        data=orjson.dumps({"object_path": object_path, "event_type": event_type, **fields}),
+    )
+
+
+def _subscription(sub_id: str = "1", user_id: str = "user1", path: str = "/projects/test"):
+    return IndexedSubscription(
+        id=sub_id,
+        user_id=user_id,
+        path=path,
+        include_children=True,
+        notification_types=None,
+    )
+
+
+def _notification(user_id: str, **kwargs) -> Notification:
+    return Notification(
+        id=f"n-{user_id}", user_id=user_id, type="updated", title="Task was updated",
+        content="Someone updated Task", severity="info", object_path="/projects/test/tasks/1",
+        is_read=False, inherited=True,
+        extra_data={"subscription_path": kwargs.get("subscription_id"), "payload_ref": "p1"},
+    )
+
+
+@pytest.fixture
+def env():
+    """Patch the session, subscription index, system writer and notification service"""
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    session.commit = AsyncMock()
+
+    index = Mock(loaded=True, match=Mock(return_value=[_subscription()]))
+    writer = Mock(running=True, enqueue=Mock())
+
+    service = Mock()
+    service.render_event = AsyncMock(return_value={
+        "title": "Task was updated", "content": "Someone updated Task",
+        "severity": "info", "action_url": None,
+    })
+    service.store_event_payload = AsyncMock(return_value="p1")
+    service.create_notification = AsyncMock(side_effect=_notification)
+    service.build_notification = AsyncMock(side_effect=_notification)
+    service.notification_repo.create = AsyncMock()
+
+    with patch("app.services.event_processor.get_async_session", return_value=session), \
+         patch("app.services.event_processor.subscription_index", index), \
+         patch("app.services.event_processor.system_event_writer", writer), \
+         patch("app.services.event_processor.NotificationService", return_value=service):
+        yield Mock(session=session, index=index, writer=writer, service=service)
+
+
+def _processor(system_sink: str = "database") -> EventProcessor:
+    processor = EventProcessor(Mock(publish=AsyncMock()))
+    processor.system_sink = system_sink
+    return processor
+
+
+class TestEventProcessor:
+    """Test fan-out of application events"""
+
+    @pytest.mark.asyncio
+    async def test_frame_includes_payload(self, env):
+        """Test the WebSocket frame carries the payload like REST responses"""
+        processor = _processor()
+
+        await processor.process_event(_message(user_name="Someone"))
+
+        subject, data = processor.nc.publish.call_args_list[0].args
+        frame = orjson.loads(data)
+        assert subject == "notification.user.user1"
+        assert frame["extra_data"]["payload_ref"] == "p1"
+        assert frame["extra_data"]["payload"] == {
+            "object_path": "/projects/test/tasks/1",
+            "event_type": "updated",
+            "user_name": "Someone",
+        }
+
+
+class TestSystemEventRouting:
+    """Test where process_event sends notifications for each system event sink"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sink", ["nats", "none"])
+    async def test_no_subscribers_returns_early(self, env, sink):
+        """Test nothing is rendered or stored without subscribers and a database sink"""
+        env.index.match.return_value = []
+        processor = _processor(sink)
+
+        await processor.process_event(_message())
+
+        env.service.render_event.assert_not_called()
+        env.service.store_event_payload.assert_not_called()
+        env.session.commit.assert_not_called()
+        env.writer.enqueue.assert_not_called()
+        subjects = [c.args[0] for c in processor.nc.publish.call_args_list]
+        assert subjects == (["system.events.updated"] if sink == "nats" else [])
+
+    @pytest.mark.asyncio
+    async def test_database_sink_without_subscribers(self, env):
+        """Test the database sink still records a system notification"""
+        env.index.match.return_value = []
+        processor = _processor("database")
+
+        await processor.process_event(_message())
+
+        system_notification, = env.writer.enqueue.call_args.args
+        assert system_notification.user_id == "system"
+        processor.nc.publish.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_nats_sink_publishes_instead_of_writing(self, env):
+        """Test the NATS sink publishes the system event and writes no system row"""
+        processor = _processor("nats")
+
+        await processor.process_event(_message())
+
+        env.service.build_notification.assert_not_called()
+        env.writer.enqueue.assert_not_called()
+        env.service.notification_repo.create.assert_not_called()
+        subjects = [c.args[0] for c in processor.nc.publish.call_args_list]
+        assert subjects == ["notification.user.user1", "system.events.updated"]
+
+    @pytest.mark.asyncio
+    async def test_database_sink_enqueues_to_writer(self, env):
+        """Test the system notification is batched while the writer runs"""
+        processor = _processor("database")
+
+        await processor.process_event(_message())
+
+        env.writer.enqueue.assert_called_once()
+        env.service.notification_repo.create.assert_not_called()
+        subjects = [c.args[0] for c in processor.nc.publish.call_args_list]
+        assert subjects == ["notification.user.user1"]
+
+    @pytest.mark.asyncio
+    async def test_stopped_writer_falls_back_to_direct_write(self, env):
+        """Test the system notification is written directly when the writer is stopped"""
+        env.writer.running = False
+        processor = _processor("database")
+
+        await processor.process_event(_message())
+
+        env.writer.enqueue.assert_not_called()
+        system_notification, = env.service.notification_repo.create.call_args.args
+        assert system_notification.user_id == "system"
+
+    def test_invalid_sink_rejected(self):
+        """Test an unknown SYSTEM_EVENT_SINK fails settings validation"""
+        settings = Settings()
+        settings.SYSTEM_EVENT_SINK = "databse"
+        with pytest.raises(ValueError, match="SYSTEM_EVENT_SINK"):
+            settings.validate()
+
+        for sink in ["database", "nats", "none"]:
+            settings.SYSTEM_EVENT_SINK = sink
+            settings.validate()
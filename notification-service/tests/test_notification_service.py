@@ -1,29 +1,47 @@
 """
 Tests for NotificationService
 """
+import orjson
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
-from datetime import datetime
-from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
 
-from app.services.notification_service import NotificationService
-from app.repositories.notification_repository import NotificationRepository
-from models import Notification
+from app.services import notification_service as notification_service_module
+from app.services.notification_service import (
+    ConfigurationService, NotificationService, SystemService, get_parent_paths, encode_cursor, decode_cursor,
+    _format_title, _object_display
+)
+from models import EventPayload, Notification
+from schemas import BulkMarkAsReadRequest
+
+_SAMPLE_IDS = ["1", "2", "3"]
+_BULK_REQ = BulkMarkAsReadRequest(notification_ids=_SAMPLE_IDS)
+
+_BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+class _StubAsyncSession:
+    """Stand-in for AsyncSession; the services only hand it to their repositories"""
+
+    def __init__(self):
+        self.commit = AsyncMock()
+        self.rollback = AsyncMock()
+        self.add = Mock()
 
 
 class TestNotificationService:
     """Test cases for NotificationService"""
 
-    @pytest.fixture
-    def mock_repository(self):
-        """Mock notification repository"""
-        return Mock(spec=NotificationRepository)
-
     @pytest.fixture
     def notification_service(self):
-        """Create NotificationService with mocked session"""
-        mock_session = Mock(spec=AsyncSession)
-        return NotificationService(mock_session)
+        """Create NotificationService with a stub session"""
+        return NotificationService(_StubAsyncSession())
+
+    @pytest.fixture(autouse=True)
+    def reset_mock_pool(self, async_mock_pool):
+        """Clear call history on the shared AsyncMocks"""
+        for mock in async_mock_pool.values():
+            mock.reset_mock()
 
     @pytest.mark.asyncio
     async def test_create_notification_basic(self, notification_service, sample_notification_data):
@@ -57,10 +75,10 @@ class TestNotificationService:
                 pytest.fail(f"Unexpected error: {e}")
 
     @pytest.mark.asyncio
-    async def test_get_notifications_basic(self, notification_service, sample_user_id):
+    async def test_get_notifications_basic(self, notification_service, sample_user_id, async_mock_pool):
         """Test getting user notifications"""
         # Mock the repository method
-        notification_service.notification_repo.get_by_user_id = AsyncMock(return_value=[])
+        notification_service.notification_repo.get_by_user_id = async_mock_pool["empty_list"]
 
         # Execute
         result = await notification_service.get_notifications(
@@ -74,10 +92,10 @@ class TestNotificationService:
         notification_service.notification_repo.get_by_user_id.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_get_notifications_with_filters(self, notification_service, sample_user_id):
+    async def test_get_notifications_with_filters(self, notification_service, sample_user_id, async_mock_pool):
         """Test getting notifications with filters"""
         # Mock the repository method
-        notification_service.notification_repo.get_by_user_id = AsyncMock(return_value=[])
+        notification_service.notification_repo.get_by_user_id = async_mock_pool["empty_list"]
 
         # Execute
         result = await notification_service.get_notifications(
@@ -92,10 +110,10 @@ class TestNotificationService:
         notification_service.notification_repo.get_by_user_id.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_mark_as_read_basic(self, notification_service):
+    async def test_mark_as_read_basic(self, notification_service, async_mock_pool):
         """Test marking notification as read"""
         # Mock the repository method
-        notification_service.notification_repo.mark_as_read = AsyncMock(return_value=True)
+        notification_service.notification_repo.mark_as_read = async_mock_pool["true"]
 
         # Execute
         result = await notification_service.mark_as_read("1", "test-user")
@@ -105,10 +123,10 @@ class TestNotificationService:
         notification_service.notification_repo.mark_as_read.assert_called_once_with("1", "test-user")
 
     @pytest.mark.asyncio
-    async def test_mark_as_read_not_found(self, notification_service):
+    async def test_mark_as_read_not_found(self, notification_service, async_mock_pool):
         """Test marking non-existent notification as read"""
         # Mock the repository method
-        notification_service.notification_repo.mark_as_read = AsyncMock(return_value=False)
+        notification_service.notification_repo.mark_as_read = async_mock_pool["false"]
 
         # Execute
         result = await notification_service.mark_as_read("999", "test-user")
@@ -120,27 +138,346 @@ class TestNotificationService:
     @pytest.mark.asyncio
     async def test_bulk_mark_as_read_basic(self, notification_service):
         """Test bulk marking notifications as read"""
-        # Setup
-        from schemas import BulkMarkAsReadRequest
-        notification_ids = ["1", "2", "3"]
-        request = BulkMarkAsReadRequest(notification_ids=notification_ids)
-        
         # Mock the repository method
-        notification_service.notification_repo.bulk_mark_as_read = AsyncMock(return_value=3)
+        notification_service.notification_repo.bulk_mark_as_read = AsyncMock(return_value=_SAMPLE_IDS)
 
         # Execute
-        result = await notification_service.bulk_mark_as_read(request, "test-user")
+        result = await notification_service.bulk_mark_as_read(_BULK_REQ, "test-user")
 
         # Assert
         assert result.updated_count == 3
         assert result.status == "success"
-        notification_service.notification_repo.bulk_mark_as_read.assert_called_once_with(notification_ids, "test-user")
+        notification_service.notification_repo.bulk_mark_as_read.assert_called_once_with(_SAMPLE_IDS, "test-user")
+
+    @pytest.mark.asyncio
+    async def test_unread_count_uses_counter(self, notification_service, async_mock_pool):
+        """Test the unread count is read from the per-user counter"""
+        notification_service.notification_repo.get_unread_count = async_mock_pool["three"]
+        notification_service.notification_repo.get_count_by_user_id = AsyncMock()
+
+        result = await notification_service.get_notification_count("test-user", is_read=False)
+
+        assert result == {"count": 3}
+        notification_service.notification_repo.get_count_by_user_id.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_render_event(self, notification_service):
+        """Test rendering fills every subscriber-independent field"""
+        notification_service.config_service.get_severity_for_event_type = AsyncMock(return_value="warning")
+
+        rendered = await notification_service.render_event(
+            "commented", "/projects/test/tasks/task-1", {"data": {"user_name": "Bob", "comment": "Nice"}}
+        )
+
+        assert rendered == {
+            "title": "New comment on Task 1",
+            "content": 'Bob commented on Task 1: "Nice"',
+            "severity": "warning",
+            "action_url": "/app/projects/test/tasks/task-1",
+        }
+        notification_service.config_service.get_severity_for_event_type.assert_called_once_with("commented")
+
+    @pytest.mark.parametrize("payload", [{}, {"data": {}}])
+    def test_generate_content_without_user_name(self, notification_service, payload):
+        """Test content falls back to a generic actor when the payload has no user"""
+        content = notification_service._generate_content("/projects/test", "updated", payload)
+        assert content == "Someone updated Test"
 
     def test_notification_service_initialization(self):
         """Test NotificationService initialization"""
-        from sqlalchemy.ext.asyncio import AsyncSession
-        mock_session = Mock(spec=AsyncSession)
-        service = NotificationService(mock_session)
+        service = NotificationService(_StubAsyncSession())
         assert service.notification_repo is not None
         assert service.subscription_repo is not None
         assert service.config_service is not None
+
+
+class TestConfigurationCache:
+    """Test cases for the TTL cache of configuration rows"""
+
+    @pytest.fixture(autouse=True)
+    def clock(self):
+        """Empty cache and a controllable clock"""
+        notification_service_module._config_cache.clear()
+        with patch.object(notification_service_module, "time") as clock:
+            clock.monotonic.return_value = 1000.0
+            yield clock
+        notification_service_module._config_cache.clear()
+
+    @pytest.fixture
+    def config_service(self):
+        """ConfigurationService over mocked repositories"""
+        service = ConfigurationService(_StubAsyncSession())
+        service.severity_repo.get_all_active = AsyncMock(return_value=[])
+        service.event_type_repo.get_by_id = AsyncMock(
+            return_value=Mock(default_severity_id="warning")
+        )
+        return service
+
+    @pytest.mark.asyncio
+    async def test_empty_result_is_not_cached(self, config_service):
+        """Test an unseeded table is read again on the next request"""
+        assert await config_service.get_severity_levels_json() == b'{"severity_levels":[]}'
+
+        config_service.severity_repo.get_all_active.return_value = [Mock(to_dict=lambda: {"id": "info"})]
+        assert await config_service.get_severity_levels_json() == b'{"severity_levels":[{"id":"info"}]}'
+
+    @pytest.mark.asyncio
+    async def test_entries_expire(self, config_service, clock):
+        """Test a cached severity is reloaded once the TTL has passed"""
+        assert await config_service.get_severity_for_event_type("created") == "warning"
+        config_service.event_type_repo.get_by_id.return_value = Mock(default_severity_id="error")
+
+        assert await config_service.get_severity_for_event_type("created") == "warning"
+
+        clock.monotonic.return_value += notification_service_module.settings.CONFIG_CACHE_TTL + 1
+        assert await config_service.get_severity_for_event_type("created") == "error"
+
+    @pytest.mark.asyncio
+    async def test_unknown_event_type_is_not_cached(self, config_service):
+        """Test the fallback severity is not pinned for unknown event types"""
+        config_service.event_type_repo.get_by_id.return_value = None
+        assert await config_service.get_severity_for_event_type("custom") == "info"
+
+        config_service.event_type_repo.get_by_id.return_value = Mock(default_severity_id="error")
+        assert await config_service.get_severity_for_event_type("custom") == "error"
+
+
+class TestRenderHelpers:
+    """Test cases for the memoized title and display name helpers"""
+
+    @pytest.mark.parametrize("path,expected", [
+        ("/projects/test/tasks/task-1", "Task 1"),
+        ("/projects/my_project", "My Project"),
+        ("/projects/my-item_v2/", "My Item V2"),
+        # root and empty paths fall back to a generic name
+        ("/", "Item"),
+        ("", "Item"),
+    ])
+    def test_object_display(self, path, expected):
+        """Test display names for root, dashed and underscored segments"""
+        assert _object_display(path) == expected
+
+    @pytest.mark.parametrize("event_type,expected", [
+        ("created", "New Task 1 created"),
+        ("updated", "Task 1 was updated"),
+        ("deleted", "Task 1 was deleted"),
+        ("commented", "New comment on Task 1"),
+        # unknown event types use the generic template
+        ("status_changed", "Status Changed on Task 1"),
+    ])
+    def test_format_title(self, event_type, expected):
+        """Test each event type template and the generic fallback"""
+        assert _format_title("/projects/test/tasks/task-1", event_type) == expected
+
+
+class TestParentPaths:
+    """Test cases for parent path enumeration"""
+
+    def test_nested_path(self):
+        """Test parents are ordered from most specific to root"""
+        assert get_parent_paths("/projects/test/tasks/1") == [
+            "/projects/test/tasks", "/projects/test", "/projects", "/"
+        ]
+
+    def test_top_level_path(self):
+        """Test a top-level path only has the root as parent"""
+        assert get_parent_paths("/projects") == ["/"]
+
+    def test_root_and_empty_path(self):
+        """Test the root and empty paths have no parents"""
+        assert get_parent_paths("/") == []
+        assert get_parent_paths("") == []
+
+    def test_path_normalization(self):
+        """Test missing leading and trailing slashes are normalized"""
+        assert get_parent_paths("projects/test/") == ["/projects", "/"]
+
+
+class TestBuildHierarchy:
+    """Test cases for the object hierarchy tree builder"""
+
+    def test_nested_tree(self):
+        """Test shared prefixes are merged and siblings sorted by segment"""
+        tree = SystemService._build_hierarchy(
+            ["/projects/beta", "/projects/alpha/tasks", "/projects-archive", "/"]
+        )
+        assert tree == [
+            {"path": "/projects", "children": [
+                {"path": "/projects/alpha", "children": [
+                    {"path": "/projects/alpha/tasks", "children": []},
+                ]},
+                {"path": "/projects/beta", "children": []},
+            ]},
+            {"path": "/projects-archive", "children": []},
+        ]
+
+    def test_empty_paths(self):
+        """Test empty and root paths produce no nodes"""
+        assert SystemService._build_hierarchy(["", "/"]) == []
+
+    def test_equal_segments_not_interned(self):
+        """Test segments are merged by value, not by object identity"""
+        projects = "".join(["proj", "ects"])
+        segmented = [(projects,), ("".join(["proj", "ects"]), "alpha")]
+        assert segmented[0][0] is not segmented[1][0]
+
+        assert SystemService._sweep_hierarchy(segmented) == [
+            {"path": "/projects", "children": [
+                {"path": "/projects/alpha", "children": []},
+            ]},
+        ]
+
+
+class TestPageCursor:
+    """Test cases for system notification page cursors"""
+
+    def test_round_trip(self):
+        """Test a cursor decodes back to its sort key"""
+        timestamp = datetime(2024, 1, 1, 12, 30, 15, 123456)
+        cursor = encode_cursor(timestamp, "notif-1|x")
+        assert decode_cursor(cursor) == (timestamp, "notif-1|x")
+
+    def test_invalid_cursor(self):
+        """Test malformed cursors are rejected"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestStreamAllNotifications:
+    """Test cases for the streamed system notification page"""
+
+    @staticmethod
+    async def _add(db, count, title="Task updated", tie_every=1):
+        """Add notifications whose timestamps repeat every ``tie_every`` rows"""
+        db.add_all([
+            Notification(
+                id=f"n{i}",
+                user_id="system",
+                type="updated",
+                title=title,
+                content="Someone updated Task",
+                severity="info",
+                object_path="/projects/test",
+                timestamp=_BASE_TIME + timedelta(minutes=i // tie_every),
+                is_read=False,
+                inherited=False,
+            )
+            for i in range(count)
+        ])
+        await db.flush()
+
+    @staticmethod
+    async def _page(db, limit, after=None, **filters):
+        """Collect and parse one streamed page"""
+        chunks = SystemService(db).stream_all_notifications(limit, 0, after, **filters)
+        return orjson.loads(b"".join([chunk async for chunk in chunks]))
+
+    @pytest.mark.asyncio
+    async def test_empty_page(self, test_db):
+        """Test an empty result is still a complete page body"""
+        assert await self._page(test_db, 3) == {"items": [], "next_cursor": None, "has_more": False}
+
+    @pytest.mark.asyncio
+    async def test_exactly_limit_rows(self, test_db):
+        """Test a page holding every remaining row reports no more pages"""
+        await self._add(test_db, 3)
+
+        page = await self._page(test_db, 3)
+
+        assert [n["id"] for n in page["items"]] == ["n2", "n1", "n0"]
+        assert page["has_more"] is False
+        assert page["next_cursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_limit_plus_one_rows(self, test_db):
+        """Test the extra row sets has_more and a cursor at the last item"""
+        await self._add(test_db, 4)
+
+        page = await self._page(test_db, 3)
+
+        assert [n["id"] for n in page["items"]] == ["n3", "n2", "n1"]
+        assert page["has_more"] is True
+        assert decode_cursor(page["next_cursor"]) == (_BASE_TIME + timedelta(minutes=1), "n1")
+
+    @pytest.mark.asyncio
+    async def test_timestamp_ties_across_pages(self, test_db):
+        """Test rows sharing a timestamp are neither skipped nor repeated between pages"""
+        await self._add(test_db, 7, tie_every=3)
+
+        seen, after = [], None
+        while True:
+            page = await self._page(test_db, 2, after)
+            seen += [n["id"] for n in page["items"]]
+            if not page["has_more"]:
+                break
+            after = decode_cursor(page["next_cursor"])
+
+        assert seen == ["n6", "n5", "n4", "n3", "n2", "n1", "n0"]
+
+    @pytest.mark.asyncio
+    async def test_search_filter(self, test_db):
+        """Test search matches the title case-insensitively"""
+        await self._add(test_db, 2)
+        test_db.add(Notification(
+            id="match", user_id="system", type="created", title="Alpha release",
+            content="Someone created a new Release", severity="info",
+            object_path="/projects/alpha", timestamp=_BASE_TIME, is_read=False, inherited=False,
+        ))
+        await test_db.flush()
+
+        page = await self._page(test_db, 10, search="ALPHA")
+
+        assert [n["id"] for n in page["items"]] == ["match"]
+        assert page["has_more"] is False
+
+
+class TestEventPayloads:
+    """Test cases for resolving shared event payloads in API rows"""
+
+    @staticmethod
+    async def _add_event(db):
+        """Add one stored payload referenced by a user and a system notification"""
+        db.add(EventPayload(id="p1", payload={"data": {"user_name": "Bob"}}))
+        db.add_all([
+            Notification(
+                id=notification_id, user_id=user_id, type="updated", title="Task was updated",
+                content="Bob updated Task", severity="info", object_path="/projects/test",
+                timestamp=_BASE_TIME, is_read=False, inherited=False,
+                extra_data={"subscription_path": None, "payload_ref": "p1"},
+            )
+            for notification_id, user_id in [("n1", "user1"), ("n2", "system")]
+        ])
+        db.add(Notification(
+            id="n3", user_id="user1", type="created", title="New Task created",
+            content="Someone created a new Task", severity="info", object_path="/projects/test",
+            timestamp=_BASE_TIME - timedelta(minutes=1), is_read=False, inherited=False,
+            extra_data={"subscription_path": None, "payload": {"inline": True}},
+        ))
+        await db.flush()
+
+    @pytest.mark.asyncio
+    async def test_user_rows_resolve_payload_ref(self, test_db):
+        """Test referenced payloads are attached and inline ones are kept"""
+        await self._add_event(test_db)
+
+        rows = await NotificationService(test_db).get_notification_rows("user1")
+
+        assert [row["extra_data"]["payload"] for row in rows] == [
+            {"data": {"user_name": "Bob"}}, {"inline": True}
+        ]
+        assert rows[0]["extra_data"]["payload_ref"] == "p1"
+
+    @pytest.mark.asyncio
+    async def test_streamed_rows_resolve_payload_ref(self, test_db):
+        """Test the system notification stream attaches referenced payloads"""
+        await self._add_event(test_db)
+
+        chunks = SystemService(test_db).stream_all_notifications(10, 0)
+        page = orjson.loads(b"".join([chunk async for chunk in chunks]))
+
+        by_id = {n["id"]: n["extra_data"]["payload"] for n in page["items"]}
+        assert by_id == {
+            "n1": {"data": {"user_name": "Bob"}},
+            "n2": {"data": {"user_name": "Bob"}},
+            "n3": {"inline": True},
+        }
@@ -3,6 +3,13 @@ Simple working tests to verify our test setup
 """
 import pytest
 from datetime import datetime, timezone
+from hypothesis import given, settings, strategies as st
+
+from app.services.notification_service import _format_content, _format_title
+from app.services.subscription_index import IndexedSubscription, PathIndex
+
+# Word each built-in event type's title is expected to contain
+_EVENT_WORDS = {"created": "created", "updated": "updated", "deleted": "deleted", "commented": "comment"}
 
 
 class TestBasicFunctionality:
@@ -45,23 +52,19 @@ class TestBasicFunctionality:
 
 
 class TestPathMatching:
-    """Test path matching logic (independent implementation)."""
+    """Test path matching logic against the subscription index used for fan-out."""
     
     def _path_matches_subscription(self, event_path: str, subscription_path: str, include_children: bool) -> bool:
-        """Test implementation of path matching logic."""
-        # Normalize paths
-        event_path = event_path.rstrip('/')
-        subscription_path = subscription_path.rstrip('/')
-        
-        # Exact match
-        if event_path == subscription_path:
-            return True
-        
-        # Child match (if enabled)
-        if include_children and event_path.startswith(subscription_path + '/'):
-            return True
-        
-        return False
+        """Match one subscription through the production path index."""
+        index = PathIndex()
+        index.add(IndexedSubscription(
+            id="sub-1",
+            user_id="user-1",
+            path=subscription_path,
+            include_children=include_children,
+            notification_types=None,
+        ))
+        return bool(index.match(event_path))
     
     def test_exact_path_match(self):
         """Test exact path matching."""
@@ -122,7 +125,7 @@ class TestNotificationFiltering:
     """Test notification filtering logic."""
     
     def _should_notify(self, notification_types, event_type: str) -> bool:
-        """Test implementation of notification filtering."""
+        """Test implementation of notification filtering; types arrive as a frozenset."""
         # If no filter, allow all
         if not notification_types:
             return True
@@ -133,7 +136,7 @@ class TestNotificationFiltering:
     def test_filter_match(self):
         """Test filtering with matching type."""
         result = self._should_notify(
-            ["task.completed", "task.failed"], 
+            frozenset(["task.completed", "task.failed"]), 
             "task.completed"
         )
         assert result is True
@@ -141,14 +144,14 @@ class TestNotificationFiltering:
     def test_filter_no_match(self):
         """Test filtering with non-matching type."""
         result = self._should_notify(
-            ["task.failed", "task.started"], 
+            frozenset(["task.failed", "task.started"]), 
             "task.completed"
         )
         assert result is False
     
     def test_no_filter(self):
         """Test no filtering (allow all)."""
-        result = self._should_notify([], "task.completed")
+        result = self._should_notify(frozenset(), "task.completed")
         assert result is True
         
         result = self._should_notify(None, "task.completed")
@@ -158,122 +161,57 @@ class TestNotificationFiltering:
 class TestTitleGeneration:
     """Test notification title generation logic."""
     
-    def _generate_title(self, path: str, event_type: str) -> str:
-        """Test implementation of title generation."""
-        # Extract object name from path
-        parts = path.strip('/').split('/')
-        object_name = parts[-1] if parts and parts[0] else "item"
-        
-        # Capitalize and format for display
-        object_display = object_name.replace('-', ' ').replace('_', ' ').title()
+    @pytest.mark.parametrize("path,event_type,expected", [
+        ("/projects/test-project/tasks/task-1", "created", "New Task 1 created"),
+        # root path falls back to a generic name
+        ("/", "created", "New Item created"),
+    ])
+    def test_title(self, path, event_type, expected):
+        """Test title generation for a known object and the root path."""
+        assert _format_title(path, event_type) == expected
+    
+    @settings(max_examples=100, deadline=None)
+    @given(
+        segments=st.lists(st.from_regex(r"[a-z_-]+", fullmatch=True), min_size=1, max_size=5),
+        event_type=st.sampled_from(["created", "updated", "deleted", "commented", "x_y"]),
+    )
+    def test_title_property(self, segments, event_type):
+        """Test every title names the last path segment and the event."""
+        title = _format_title("/" + "/".join(segments), event_type)
+        object_display = segments[-1].replace('-', ' ').replace('_', ' ').title()
         
-        if event_type == "created":
-            return f"New {object_display} created"
-        elif event_type == "updated":
-            return f"{object_display} was updated"
-        elif event_type == "deleted":
-            return f"{object_display} was deleted"
-        elif event_type == "commented":
-            return f"New comment on {object_display}"
+        assert object_display in title
+        if event_type == "x_y":
+            assert title == f"X Y on {object_display}"
         else:
-            return f"{event_type.replace('_', ' ').title()} on {object_display}"
-    
-    def test_created_title(self):
-        """Test title generation for created events."""
-        title = self._generate_title("/projects/test-project/tasks/task-1", "created")
-        assert "New Task" in title and "created" in title
-    
-    def test_updated_title(self):
-        """Test title generation for updated events."""
-        title = self._generate_title("/projects/test-project/tasks/task-1", "updated")
-        assert "Task" in title and "was updated" in title
-    
-    def test_deleted_title(self):
-        """Test title generation for deleted events."""
-        title = self._generate_title("/projects/test-project/tasks/task-1", "deleted")
-        assert "Task" in title and "was deleted" in title
-    
-    def test_commented_title(self):
-        """Test title generation for comment events."""
-        title = self._generate_title("/projects/test-project/tasks/task-1", "commented")
-        assert "New comment on Task" in title
-    
-    def test_custom_event_title(self):
-        """Test title generation for custom events."""
-        title = self._generate_title("/projects/test-project/tasks/task-1", "task_completed")
-        assert "Task Completed on Task" in title
-    
-    def test_title_with_underscores(self):
-        """Test title generation with underscore in object name."""
-        title = self._generate_title("/projects/test_project/items/my_item", "created")
-        assert "New My Item created" in title
-    
-    def test_title_with_dashes(self):
-        """Test title generation with dashes in object name."""
-        title = self._generate_title("/projects/test-project/items/my-item", "created")
-        assert "New My Item created" in title
+            assert _EVENT_WORDS[event_type] in title.lower()
 
 
 class TestContentGeneration:
     """Test notification content generation logic."""
     
-    def _generate_content(self, path: str, event_type: str, payload: dict) -> str:
-        """Test implementation of content generation."""
-        # Extract object name from path
-        parts = path.strip('/').split('/')
-        object_name = parts[-1] if parts and parts[0] else "item"
-        object_display = object_name.replace('-', ' ').replace('_', ' ').title()
+    @pytest.mark.parametrize("event_type,user_name,comment,expected", [
+        ("created", "John Doe", "", "John Doe created a new Task 1"),
+        ("updated", "Jane Smith", "", "Jane Smith updated Task 1"),
+        ("deleted", "Jane Smith", "", "Jane Smith deleted Task 1"),
+        ("commented", "Bob", "This looks great!", 'Bob commented on Task 1: "This looks great!"'),
+        # custom event type
+        ("task_completed", "Charlie", "", "Charlie performed task completed on Task 1"),
+    ])
+    def test_content(self, event_type, user_name, comment, expected):
+        """Test content generation for each event type."""
+        assert _format_content("/projects/test/tasks/task-1", event_type, user_name, comment) == expected
+    
+    @settings(max_examples=100, deadline=None)
+    @given(
+        segments=st.lists(st.from_regex(r"[a-z_-]+", fullmatch=True), min_size=1, max_size=5),
+        event_type=st.sampled_from(["created", "updated", "deleted", "commented", "x_y"]),
+        user_name=st.text(min_size=1, max_size=20),
+    )
+    def test_content_property(self, segments, event_type, user_name):
+        """Test all content starts with the user and names the last path segment."""
+        content = _format_content("/" + "/".join(segments), event_type, user_name, "")
+        object_display = segments[-1].replace('-', ' ').replace('_', ' ').title()
         
-        # Get data from payload
-        data = payload.get("data", {})
-        user_name = data.get("user_name", "Someone")
-        
-        if event_type == "created":
-            return f"{user_name} created a new {object_display}"
-        elif event_type == "updated":
-            return f"{user_name} updated {object_display}"
-        elif event_type == "deleted":
-            return f"{user_name} deleted {object_display}"
-        elif event_type == "commented":
-            comment = data.get("comment", "")
-            if comment:
-                return f"{user_name} commented on {object_display}: {comment[:50]}..."
-            return f"{user_name} commented on {object_display}"
-        else:
-            return f"{user_name} performed {event_type} on {object_display}"
-    
-    def test_created_content(self):
-        """Test content generation for created events."""
-        payload = {"data": {"user_name": "John Doe"}}
-        content = self._generate_content("/projects/test/tasks/task-1", "created", payload)
-        assert "John Doe created a new Task" in content
-    
-    def test_updated_content(self):
-        """Test content generation for updated events."""
-        payload = {"data": {"user_name": "Jane Smith"}}
-        content = self._generate_content("/projects/test/tasks/task-1", "updated", payload)
-        assert "Jane Smith updated Task" in content
-    
-    def test_commented_content_with_comment(self):
-        """Test content generation for comment events with comment text."""
-        payload = {"data": {"user_name": "Bob", "comment": "This looks great!"}}
-        content = self._generate_content("/projects/test/tasks/task-1", "commented", payload)
-        assert "Bob commented on Task" in content and "This looks great!" in content
-    
-    def test_commented_content_without_comment(self):
-        """Test content generation for comment events without comment text."""
-        payload = {"data": {"user_name": "Alice"}}
-        content = self._generate_content("/projects/test/tasks/task-1", "commented", payload)
-        assert "Alice commented on Task" in content
-    
-    def test_content_with_default_user(self):
-        """Test content generation with default user name."""
-        payload = {}
-        content = self._generate_content("/projects/test/tasks/task-1", "created", payload)
-        assert "Someone created a new Task" in content
-    
-    def test_custom_event_content(self):
-        """Test content generation for custom events."""
-        payload = {"data": {"user_name": "Charlie"}}
-        content = self._generate_content("/projects/test/tasks/task-1", "task_completed", payload)
-        assert "Charlie performed task_completed on Task" in content
+        assert content.startswith(user_name + " ")
+        assert object_display in content
@@ -0,0 +1,135 @@
+"""
+Tests for the user subscription list cache
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.services.notification_service import SubscriptionService
+from app.services.subscription_cache import SubscriptionCache
+from schemas import SubscriptionResponse
+
+
+def _subscription(sub_id: str = "1", user_id: str = "user1") -> SubscriptionResponse:
+    return SubscriptionResponse(
+        id=sub_id,
+        user_id=user_id,
+        path="/projects/test",
+        include_children=True,
+        created_at=datetime(2024, 1, 1),
+    )
+
+
+class TestSubscriptionCache:
+    """Test expiry and invalidation of cached subscription lists"""
+
+    def test_hit_until_ttl_expires(self):
+        """Test an entry is served until its TTL passes"""
+        cache = SubscriptionCache(ttl=300)
+        subscriptions = [_subscription()]
+        with patch("app.services.subscription_cache.time") as clock:
+            clock.monotonic.return_value = 1000.0
+            cache.set("user1", subscriptions, cache.generation("user1"))
+
+            clock.monotonic.return_value = 1299.0
+            assert cache.get("user1") is subscriptions
+
+            clock.monotonic.return_value = 1301.0
+            assert cache.get("user1") is None
+
+    def test_zero_ttl_disables_caching(self):
+        """Test nothing is cached when the TTL is zero"""
+        cache = SubscriptionCache(ttl=0)
+        cache.set("user1", [_subscription()], cache.generation("user1"))
+        assert cache.get("user1") is None
+
+    @pytest.mark.asyncio
+    async def test_local_invalidation(self):
+        """Test invalidate drops the entry and broadcasts the user ID"""
+        cache = SubscriptionCache()
+        cache.nc = Mock(publish=AsyncMock())
+        cache.set("user1", [_subscription()], cache.generation("user1"))
+        cache.set("user2", [_subscription(user_id="user2")], cache.generation("user2"))
+
+        await cache.invalidate("user1")
+
+        assert cache.get("user1") is None
+        assert cache.get("user2") is not None
+        cache.nc.publish.assert_called_once_with("sub.invalidate.user1", b"")
+
+    @pytest.mark.asyncio
+    async def test_invalidation_broadcast(self):
+        """Test an invalidation from another instance drops the entry"""
+        cache = SubscriptionCache()
+        cache.set("user1", [_subscription()], cache.generation("user1"))
+
+        await cache._on_invalidate(Mock(subject="sub.invalidate.user1"))
+
+        assert cache.get("user1") is None
+
+    @pytest.mark.asyncio
+    async def test_stale_write_after_invalidation_is_ignored(self):
+        """Test a list read before an invalidation is not cached after it"""
+        cache = SubscriptionCache()
+        generation = cache.generation("user1")
+
+        # A subscription changes while the caller is reading from the database
+        await cache._on_invalidate(Mock(subject="sub.invalidate.user1"))
+        cache.set("user1", [_subscription()], generation)
+
+        assert cache.get("user1") is None
+
+    @pytest.mark.asyncio
+    async def test_service_read_racing_invalidation(self):
+        """Test get_subscriptions does not cache a list invalidated mid-read"""
+        cache = SubscriptionCache()
+        service = SubscriptionService(Mock())
+
+        async def read_during_change(user_id):
+            await cache.invalidate(user_id)
+            return [_subscription()]
+
+        service.subscription_repo.get_by_user_id = AsyncMock(side_effect=read_during_change)
+        with patch("app.services.notification_service.subscription_cache", cache):
+            result = await service.get_subscriptions("user1")
+
+        assert [s.id for s in result] == ["1"]
+        assert cache.get("user1") is None
+
+    def test_prune_drops_expired_entries(self):
+        """Test expired entries are removed once the size threshold is reached"""
+        cache = SubscriptionCache(ttl=300, prune_threshold=3)
+        with patch("app.services.subscription_cache.time") as clock:
+            clock.monotonic.return_value = 1000.0
+            cache.set("user1", [_subscription()], cache.generation("user1"))
+            cache.set("user2", [_subscription(user_id="user2")], cache.generation("user2"))
+
+            clock.monotonic.return_value = 1400.0
+            cache.set("user3", [_subscription(user_id="user3")], cache.generation("user3"))
+
+            assert set(cache._entries) == {"user3"}
+
+    @pytest.mark.asyncio
+    async def test_prune_drops_invalidation_records(self):
+        """Test invalidations of users without an entry are not kept forever"""
+        cache = SubscriptionCache(prune_threshold=3)
+        for user_id in ["user1", "user2"]:
+            await cache._on_invalidate(Mock(subject=f"sub.invalidate.{user_id}"))
+
+        cache.set("user3", [_subscription(user_id="user3")], cache.generation("user3"))
+
+        assert cache._invalidated == {}
+        assert cache.get("user3") is not None
+
+    @pytest.mark.asyncio
+    async def test_stale_write_rejected_after_prune(self):
+        """Test a read racing an invalidation is not cached once the record is pruned"""
+        cache = SubscriptionCache(prune_threshold=2)
+        generation = cache.generation("user1")
+
+        await cache._on_invalidate(Mock(subject="sub.invalidate.user1"))
+        cache.set("user2", [_subscription(user_id="user2")], cache.generation("user2"))
+        assert "user1" not in cache._invalidated
+
+        cache.set("user1", [_subscription()], generation)
+        assert cache.get("user1") is None
@@ -0,0 +1,132 @@
+"""
+Tests for the in-process subscription index
+"""
+import pytest
+from unittest.mock import patch
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import NotificationSubscription
+from app.services.subscription_index import IndexedSubscription, PathIndex, SubscriptionIndex
+
+
+def _sub(sub_id: str, path: str, include_children: bool = True, user_id: str = "user1"):
+    return IndexedSubscription(
+        id=sub_id,
+        user_id=user_id,
+        path=path,
+        include_children=include_children,
+        notification_types=None,
+    )
+
+
+class TestPathIndex:
+    """Test path matching through the index"""
+
+    def test_direct_match(self):
+        """Test a direct subscription matches its own path"""
+        index = PathIndex()
+        index.add(_sub("1", "/projects/test", include_children=False))
+        assert [s.id for s in index.match("/projects/test")] == ["1"]
+
+    def test_child_match_requires_include_children(self):
+        """Test parent subscriptions only match children when enabled"""
+        index = PathIndex()
+        index.add(_sub("1", "/projects/test", include_children=True))
+        index.add(_sub("2", "/projects/test", include_children=False))
+        assert [s.id for s in index.match("/projects/test/tasks/1")] == ["1"]
+
+    def test_root_subscription_matches_everything(self):
+        """Test a subscription on / covers every path"""
+        index = PathIndex()
+        index.add(_sub("1", "/"))
+        assert [s.id for s in index.match("/projects/test")] == ["1"]
+
+    def test_no_match(self):
+        """Test sibling paths don't match"""
+        index = PathIndex()
+        index.add(_sub("1", "/projects/test"))
+        assert index.match("/projects/other") == []
+        assert index.match("/projects/testing") == []
+
+    def test_remove_prunes_empty_paths(self):
+        """Test removing the last subscription on a path drops it"""
+        index = PathIndex()
+        index.add(_sub("1", "/projects/test/tasks"))
+        index.remove("1", "/projects/test/tasks")
+        assert index.match("/projects/test/tasks") == []
+        assert index.by_path == {}
+
+    def test_trailing_slash_matches_like_the_database(self):
+        """Test stored paths compare as exact strings, as in the SQL lookup"""
+        index = PathIndex()
+        index.add(_sub("1", "/projects/test/"))
+        assert index.match("/projects/test") == []
+        assert index.match("/projects/test/tasks/1") == []
+
+    def test_event_path_is_normalized(self):
+        """Test event paths are normalized the same way before the SQL lookup"""
+        index = PathIndex()
+        index.add(_sub("1", "/projects/test", include_children=False))
+        assert [s.id for s in index.match("projects/test/")] == ["1"]
+
+    def test_notification_types_stored_as_shared_set(self):
+        """Test event type filters are indexed as one frozenset per distinct list"""
+        index = PathIndex()
+        index.add(_sub("1", "/projects/a")._replace(notification_types=["created", "updated"]))
+        index.add(_sub("2", "/projects/b")._replace(notification_types=["created", "updated"]))
+        first, = index.match("/projects/a")
+        second, = index.match("/projects/b")
+        assert first.notification_types == frozenset({"created", "updated"})
+        assert first.notification_types is second.notification_types
+
+
+class TestSubscriptionIndex:
+    """Test applying change messages to the index"""
+
+    @pytest.mark.asyncio
+    async def test_upsert_and_delete(self):
+        """Test changes are applied locally without a NATS connection"""
+        index = SubscriptionIndex()
+        subscription = _sub("1", "/projects/test")
+
+        await index.publish_change("upsert", subscription)
+        assert [s.id for s in index.match("/projects/test/tasks/1")] == ["1"]
+
+        await index.publish_change("delete", subscription)
+        assert index.match("/projects/test/tasks/1") == []
+
+    @pytest.mark.asyncio
+    async def test_reload_picks_up_missed_changes(self, test_engine, test_db):
+        """Test a reload adds subscriptions whose change message was lost"""
+        index = SubscriptionIndex()
+        test_db.add(NotificationSubscription(
+            id="missed", user_id="user1", path="/projects/test", include_children=True,
+        ))
+        await test_db.commit()
+
+        try:
+            with patch(
+                "app.services.subscription_index.get_async_session",
+                side_effect=lambda: AsyncSession(test_engine),
+            ):
+                await index.reload()
+            assert index.loaded
+            assert [s.id for s in index.match("/projects/test/tasks/1")] == ["missed"]
+        finally:
+            await test_db.execute(delete(NotificationSubscription))
+            await test_db.commit()
+
+    @pytest.mark.asyncio
+    async def test_failed_reload_keeps_current_index(self):
+        """Test a database error during reload leaves the index in place"""
+        index = SubscriptionIndex()
+        await index.publish_change("upsert", _sub("1", "/projects/test"))
+
+        with patch(
+            "app.services.subscription_index.get_async_session",
+            side_effect=RuntimeError("database unavailable"),
+        ):
+            await index.reload()
+
+        assert [s.id for s in index.match("/projects/test")] == ["1"]
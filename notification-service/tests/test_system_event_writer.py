@@ -0,0 +1,115 @@
+"""
+Tests for the batched system notification writer
+"""
+import asyncio
+import orjson
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.notification_service import SystemService
+from app.services.system_event_writer import SystemEventWriter
+from models import Notification
+
+
+def _notification(notification_id: str, path: str = "/projects/test", event_type: str = "updated"):
+    return Notification(id=notification_id, user_id="system", type=event_type, object_path=path)
+
+
+@pytest.fixture
+def create_many():
+    """Patch the repository used by the writer and capture written batches"""
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    repository = MagicMock()
+    repository.create_many = AsyncMock()
+    with patch("app.services.system_event_writer.get_async_session", return_value=session), \
+         patch("app.services.system_event_writer.NotificationRepository", return_value=repository):
+        yield repository.create_many
+
+
+class TestSystemEventWriter:
+    """Test cases for SystemEventWriter"""
+
+    @pytest.mark.asyncio
+    async def test_batches_queued_notifications(self, create_many):
+        """Test notifications queued within one window are written together"""
+        writer = SystemEventWriter(flush_interval=0.01)
+        writer.start()
+        for i in range(3):
+            writer.enqueue(_notification(str(i)))
+
+        await asyncio.sleep(0.05)
+        await writer.stop()
+
+        create_many.assert_called_once()
+        assert [n.id for n in create_many.call_args.args[0]] == ["0", "1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_coalesces_repeated_events(self, create_many):
+        """Test only the latest notification per path and event type is kept"""
+        writer = SystemEventWriter(coalesce=True)
+        writer.enqueue(_notification("1"))
+        writer.enqueue(_notification("2"))
+        writer.enqueue(_notification("3", event_type="created"))
+
+        await writer.stop()
+
+        assert [n.id for n in create_many.call_args.args[0]] == ["2", "3"]
+
+    @pytest.mark.asyncio
+    async def test_stop_during_window_writes_everything(self, create_many):
+        """Test stopping while a batch window is open loses no notifications"""
+        writer = SystemEventWriter(flush_interval=10)
+        writer.start()
+        for i in range(3):
+            writer.enqueue(_notification(str(i)))
+
+        # Let the task take the first notification and start its window
+        await asyncio.sleep(0.01)
+        await writer.stop()
+
+        written = [n.id for call in create_many.call_args_list for n in call.args[0]]
+        assert written == ["0", "1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried(self, create_many):
+        """Test a batch that fails to write is kept for the next window"""
+        create_many.side_effect = [RuntimeError("db down"), None]
+        writer = SystemEventWriter(flush_interval=0.01)
+        writer.start()
+        writer.enqueue(_notification("1"))
+
+        await asyncio.sleep(0.1)
+        await writer.stop()
+
+        assert create_many.call_count == 2
+        assert [n.id for n in create_many.call_args.args[0]] == ["1"]
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_enqueue_order(self, test_engine, test_db):
+        """Test a batch reads back from the system log in the order it was queued"""
+        writer = SystemEventWriter()
+        # IDs deliberately out of order, since they break timestamp ties
+        for notification_id in ["b", "c", "a"]:
+            writer.enqueue(Notification(
+                id=notification_id, user_id="system", type="updated", title="Task was updated",
+                content="Someone updated Task", severity="info", object_path="/projects/test",
+                is_read=False, inherited=False,
+            ))
+
+        with patch(
+            "app.services.system_event_writer.get_async_session",
+            side_effect=lambda: AsyncSession(test_engine),
+        ):
+            await writer.stop()
+
+        try:
+            chunks = SystemService(test_db).stream_all_notifications(10, 0)
+            page = orjson.loads(b"".join([chunk async for chunk in chunks]))
+            assert [n["id"] for n in page["items"]] == ["a", "c", "b"]
+        finally:
+            await test_db.execute(delete(Notification))
+            await test_db.commit()
@@ -0,0 +1,106 @@
+"""
+Tests for the NATS to WebSocket fan-out hub
+"""
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.services.websocket_hub import WebSocketHub
+
+
+def _msg(user_id: str, data: bytes = b'{"id": "n1"}'):
+    return Mock(subject=f"notification.user.{user_id}", data=data)
+
+
+@pytest.fixture
+def hub():
+    """Hub whose sender tasks are cancelled after each test"""
+    hub = WebSocketHub(queue_size=2)
+    yield hub
+    for user_id, outboxes in list(hub._connections.items()):
+        for websocket in list(outboxes):
+            hub.unregister(user_id, websocket)
+
+
+class TestWebSocketHub:
+    """Test dispatch of user notifications to registered sockets"""
+
+    @pytest.mark.asyncio
+    async def test_forwards_to_all_user_sockets(self, hub):
+        """Test every socket of the addressed user receives the payload"""
+        first, second, other = AsyncMock(), AsyncMock(), AsyncMock()
+        hub.register("user1", first)
+        hub.register("user1", second)
+        hub.register("user2", other)
+
+        await hub._on_message(_msg("user1"))
+        await asyncio.sleep(0)
+
+        first.send_text.assert_awaited_once_with('{"id": "n1"}')
+        second.send_text.assert_awaited_once_with('{"id": "n1"}')
+        other.send_text.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_failed_send_does_not_block_others(self, hub):
+        """Test one broken socket does not stop delivery to the rest"""
+        broken, healthy = AsyncMock(), AsyncMock()
+        broken.send_text.side_effect = RuntimeError("closed")
+        hub.register("user1", broken)
+        hub.register("user1", healthy)
+
+        await hub._on_message(_msg("user1"))
+        await asyncio.sleep(0)
+
+        healthy.send_text.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_slow_socket_drops_oldest(self, hub):
+        """Test a full queue drops the oldest notification, not the newest"""
+        websocket = AsyncMock()
+        hub.register("user1", websocket)
+
+        # No yield to the sender task in between, so the queue fills up
+        for i in range(3):
+            await hub._on_message(_msg("user1", f'{{"id": "n{i}"}}'.encode()))
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+        sent = [call.args[0] for call in websocket.send_text.await_args_list]
+        assert sent == ['{"id": "n1"}', '{"id": "n2"}']
+
+    @pytest.mark.asyncio
+    async def test_drops_are_logged_once_per_interval(self, hub, caplog):
+        """Test a slow socket logs its first drop, then a summary per interval"""
+        websocket = AsyncMock()
+        hub.register("user1", websocket)
+        outbox = hub._connections["user1"][websocket]
+
+        with patch("app.services.websocket_hub.time") as clock:
+            clock.monotonic.return_value = 100.0
+            for i in range(10):
+                await hub._on_message(_msg("user1", f'{{"id": "n{i}"}}'.encode()))
+            warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+            assert len(warnings) == 1
+            assert "dropped 1 notifications (1 in total)" in warnings[0]
+
+            clock.monotonic.return_value = 100.0 + outbox.REPORT_INTERVAL
+            await hub._on_message(_msg("user1", b'{"id": "last"}'))
+
+        warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+        assert len(warnings) == 2
+        assert "dropped 8 notifications (9 in total)" in warnings[1]
+        assert outbox.dropped == 9
+
+    @pytest.mark.asyncio
+    async def test_unregister(self, hub):
+        """Test unregistered sockets stop receiving and empty users are dropped"""
+        websocket = AsyncMock()
+        hub.register("user1", websocket)
+        hub.unregister("user1", websocket)
+
+        await hub._on_message(_msg("user1"))
+        await asyncio.sleep(0)
+
+        websocket.send_text.assert_not_awaited()
+        assert hub._connections == {}